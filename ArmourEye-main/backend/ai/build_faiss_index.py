@@ -0,0 +1,58 @@
+"""
+NOTE: This is a UTILITY SCRIPT, not part of the main application runtime.
+One-time migration of the Chroma vector store to a FAISS index for
+simple_rag_server.py (VECTOR_BACKEND=faiss).
+
+---
+
+Reads every embedding + metadata + document from the Chroma collection and writes:
+  vectorestore/faiss_v2/index.faiss   exact inner-product index (IndexFlatIP)
+  vectorestore/faiss_v2/docs.jsonl    one {"metadata", "document"} line per vector row
+
+Vectors are L2-normalised, so inner product == cosine similarity.
+
+To run it:
+  cd ArmourEye-main
+  python backend/ai/build_faiss_index.py
+"""
+
+import json
+import os
+from pathlib import Path
+
+import chromadb
+import faiss
+import numpy as np
+
+AI_DIR = Path(__file__).resolve().parent
+CHROMA_DIR = Path(os.getenv("VECTORSTORE_DIR", AI_DIR / "vectorestore" / "chroma_db_v2"))
+FAISS_DIR = Path(os.getenv("VECTOR_FAISS_DIR", AI_DIR / "vectorestore" / "faiss_v2"))
+COLLECTION_NAME = os.getenv("VECTOR_COLLECTION", "langchain")
+
+
+def main():
+    print(f"Reading Chroma collection '{COLLECTION_NAME}' from {CHROMA_DIR}...")
+    client = chromadb.PersistentClient(path=str(CHROMA_DIR))
+    collection = client.get_collection(COLLECTION_NAME)
+    data = collection.get(include=["embeddings", "metadatas", "documents"])
+
+    vectors = np.asarray(data["embeddings"], dtype=np.float32)
+    if vectors.ndim != 2 or not len(vectors):
+        print("❌ Collection has no embeddings; nothing to export.")
+        return
+    faiss.normalize_L2(vectors)
+
+    index = faiss.IndexFlatIP(vectors.shape[1])
+    index.add(vectors)
+
+    FAISS_DIR.mkdir(parents=True, exist_ok=True)
+    faiss.write_index(index, str(FAISS_DIR / "index.faiss"))
+    with open(FAISS_DIR / "docs.jsonl", "w", encoding="utf-8") as f:
+        for metadata, document in zip(data["metadatas"], data["documents"]):
+            f.write(json.dumps({"metadata": metadata or {}, "document": document}, ensure_ascii=False) + "\n")
+
+    print(f"✅ Wrote {index.ntotal} vectors (dim={vectors.shape[1]}) to {FAISS_DIR}")
+
+
+if __name__ == "__main__":
+    main()
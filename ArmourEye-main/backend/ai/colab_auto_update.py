@@ -10,16 +10,31 @@ Run this after getting your Cloudflare URL
 
 import re
 import json
+import mmap
 import time
 import requests
 from pathlib import Path
 
+URL_RE = re.compile(rb'https://[a-z0-9-]+\.trycloudflare\.com')
+# Poll instead of one fixed sleep: fast tunnels are picked up sooner, slow ones still get ~5s
+URL_POLL_ATTEMPTS = 10
+URL_POLL_INTERVAL = 0.5
+
+
+def find_url_in_log(log_file):
+    """Scan a log file for the tunnel URL without reading it into a string."""
+    with open(log_file, 'rb') as f:
+        # mmap can't map an empty file; the tunnel just hasn't written yet
+        if log_file.stat().st_size == 0:
+            return None
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            url_match = URL_RE.search(mm)
+            return url_match.group(0).decode('ascii') if url_match else None
+
+
 print("🤖 Auto-updating ArmourEye remote URL...")
 print("=" * 60)
 
-# Wait for tunnel to initialize
-time.sleep(2)
-
 # Read tunnel log and extract URL
 # Try multiple possible locations for tunnel.log
 cloudflare_url = None
@@ -29,20 +44,21 @@ tunnel_log_paths = [
     Path.cwd() / 'tunnel.log',  # Current working directory
 ]
 
-for log_path in tunnel_log_paths:
-    try:
-        log_file = Path(log_path)
-        if log_file.exists():
-            with open(log_file, 'r') as f:
-                log = f.read()
-            
-            url_match = re.search(r'https://[a-z0-9-]+\.trycloudflare\.com', log)
-            if url_match:
-                cloudflare_url = url_match.group(0)
-                print(f"✅ Found URL in {log_path}")
-                break
-    except:
-        continue
+for attempt in range(URL_POLL_ATTEMPTS):
+    for log_path in tunnel_log_paths:
+        try:
+            log_file = Path(log_path)
+            if log_file.exists():
+                cloudflare_url = find_url_in_log(log_file)
+                if cloudflare_url:
+                    print(f"✅ Found URL in {log_path}")
+                    break
+        except:
+            continue
+    if cloudflare_url:
+        break
+    # Wait for tunnel to initialize
+    time.sleep(URL_POLL_INTERVAL)
 
 # If still not found, try to get from global variable (if running in notebook)
 if not cloudflare_url:
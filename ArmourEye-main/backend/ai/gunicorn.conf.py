@@ -0,0 +1,45 @@
+"""
+gunicorn settings for running simple_rag_server.py with several workers.
+
+To run it:
+  cd ArmourEye-main
+  gunicorn -c backend/ai/gunicorn.conf.py backend.ai.simple_rag_server:app
+
+The app is preloaded in the master, so the master dataset index and the vector
+store are loaded once and shared copy-on-write by every worker. Only one worker
+at a time loads Mistral onto the GPU (AI_LLM_WORKER=1); the others serve the
+dataset/RAG paths and answer LLM requests with the structured summary.
+With VECTOR_BACKEND=faiss the index is plain memory and is shared as-is; with
+Chroma each worker reopens its own client (and SQLite handles) on first use
+after fork, since those must not be shared across processes.
+"""
+
+import os
+
+bind = f"0.0.0.0:{os.getenv('AI_SERVER_PORT', '8000')}"
+workers = int(os.getenv("AI_SERVER_WORKERS", "4"))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+# The first request in the LLM worker can sit behind model loading
+timeout = int(os.getenv("AI_SERVER_TIMEOUT", "300"))
+
+# CUDA can't be used in a child forked after the parent initialised it, so the
+# preloaded embedder stays on CPU and torch's CUDA probe must not create a context
+os.environ.setdefault("VECTOR_EMBED_DEVICE", "cpu")
+os.environ.setdefault("PYTORCH_NVML_BASED_CUDA_CHECK", "1")
+
+_llm_worker = {"owner": None}
+
+
+def pre_fork(server, worker):
+    # Runs in the master just before each fork; the child inherits os.environ
+    owns_llm = _llm_worker["owner"] is None
+    if owns_llm:
+        _llm_worker["owner"] = worker
+    os.environ["AI_LLM_WORKER"] = "1" if owns_llm else "0"
+
+
+def child_exit(server, worker):
+    # Let the replacement worker pick the GPU back up
+    if _llm_worker["owner"] is worker:
+        _llm_worker["owner"] = None
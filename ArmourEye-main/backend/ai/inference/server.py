@@ -19,14 +19,23 @@ The exact same file is used for both local and Colab runs.
 
 from __future__ import annotations
 
+import contextlib
+import importlib.util
 import json
 import logging
 import os
+import threading
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from types import MappingProxyType, SimpleNamespace
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
+import anyio.to_thread
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, ORJSONResponse, StreamingResponse
 from pydantic import BaseModel, Field, ConfigDict, AliasChoices
 
 try:
@@ -44,17 +53,31 @@ except Exception:  # pragma: no cover - optional dependency
   BitsAndBytesConfig = None
   pipeline = None
 
+if torch:
+  # Allow TF32 matmuls on Ampere+ for any fp32 ops left in generation
+  torch.set_float32_matmul_precision("high")
+
+try:
+  from vllm import LLM as VLLMEngine, SamplingParams  # type: ignore
+except Exception:  # pragma: no cover - optional dependency
+  VLLMEngine = None
+  SamplingParams = None
+
+try:
+  import orjson  # type: ignore
+except Exception:  # pragma: no cover - optional dependency
+  orjson = None
+
 try:
-  from langchain_community.embeddings import HuggingFaceEmbeddings  # type: ignore
   from langchain_community.vectorstores import Chroma  # type: ignore
 except Exception:  # pragma: no cover - optional dependency
-  HuggingFaceEmbeddings = None
   Chroma = None
 
 
-BASE_DIR = Path(__file__).resolve().parents[1]
-DEFAULT_MODEL_DIR = BASE_DIR / "models" / "mistral"
-DEFAULT_VECTOR_DIR = BASE_DIR / "vectorestore" / "chroma_db_v2"
+# Plain string joins (no Path.resolve()) so startup doesn't lstat every parent directory
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_MODEL_DIR = os.path.join(BASE_DIR, "models", "mistral")
+DEFAULT_VECTOR_DIR = os.path.join(BASE_DIR, "vectorestore", "chroma_db_v2")
 
 logging.basicConfig(
   level=os.getenv("AI_LOG_LEVEL", "INFO").upper(),
@@ -63,14 +86,95 @@ logging.basicConfig(
 LOGGER = logging.getLogger("armoureye.ai.inference")
 
 
+# ---------------------------------------------------------------------------
+# Settings
+# ---------------------------------------------------------------------------
+
+
+def _env_flag(name: str, default: str) -> bool:
+  return os.getenv(name, default).lower() in {"1", "true", "yes"}
+
+
+@dataclass(frozen=True)
+class Settings:
+  """Environment-derived configuration, parsed once per process."""
+
+  vector_dir: str
+  vector_collection: str
+  vector_cache_size: int
+  vector_negative_cache_size: int
+  vector_preindex: bool
+  mistral_model_path: str
+  mistral_max_new_tokens: int
+  mistral_temperature: float
+  mistral_quantization: str
+  mistral_device_map: str
+  mistral_batch_size: int
+  mistral_summarize_statuses: frozenset
+  mistral_enabled: bool
+  mistral_backend: str
+  mistral_max_model_len: int
+  cors_allow_origins: List[str]
+  threadpool_size: int
+
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+  return Settings(
+    vector_dir=os.getenv("VECTORSTORE_DIR", DEFAULT_VECTOR_DIR),
+    vector_collection=os.getenv("VECTOR_COLLECTION", "langchain"),
+    vector_cache_size=int(os.getenv("VECTOR_CACHE_SIZE", "4096")),
+    vector_negative_cache_size=int(os.getenv("VECTOR_NEGATIVE_CACHE_SIZE", "10000")),
+    vector_preindex=os.getenv("VECTOR_PREINDEX", "1").lower() not in {"0", "false", "no"},
+    mistral_model_path=os.getenv("MISTRAL_MODEL_PATH", DEFAULT_MODEL_DIR),
+    mistral_max_new_tokens=int(os.getenv("MISTRAL_MAX_NEW_TOKENS", "512")),
+    mistral_temperature=float(os.getenv("MISTRAL_TEMPERATURE", "0.2")),
+    mistral_quantization=os.getenv("MISTRAL_QUANTIZATION", "4bit").lower(),
+    mistral_device_map=os.getenv("MISTRAL_DEVICE_MAP", "auto"),
+    mistral_batch_size=max(1, int(os.getenv("MISTRAL_BATCH_SIZE", "8"))),
+    mistral_summarize_statuses=frozenset(
+      status.strip().upper()
+      for status in os.getenv("MISTRAL_SUMMARIZE_STATUSES", "VULNERABLE").split(",")
+      if status.strip()
+    ),
+    mistral_enabled=not _env_flag("MISTRAL_DISABLE", "false"),
+    mistral_backend=os.getenv("MISTRAL_BACKEND", "hf").lower(),
+    mistral_max_model_len=int(os.getenv("MISTRAL_MAX_MODEL_LEN", "4096")),
+    cors_allow_origins=os.getenv("AI_CORS_ALLOW_ORIGINS", "*").split(","),
+    threadpool_size=int(os.getenv("AI_THREADPOOL_SIZE", "32")),
+  )
+
+
 # ---------------------------------------------------------------------------
 # Utility functions (lifted from rag_enhanced.py with minor adjustments)
 # ---------------------------------------------------------------------------
 
-def _format_docs(docs: List[Any]) -> List[Dict[str, Any]]:
+_json_loads = orjson.loads if orjson else json.loads
+
+
+def _dumps_line(payload: Dict[str, Any]) -> bytes:
+  """Encode one NDJSON line."""
+  if orjson:
+    return orjson.dumps(payload, default=str) + b"\n"
+  return (json.dumps(payload, default=str, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+def _parse_json_list(raw: Optional[str]) -> List[Any]:
+  """Decode a JSON-encoded list from Chroma metadata, tolerating bad values."""
+  try:
+    return _json_loads(raw or "[]")
+  except Exception:
+    return []
+
+
+def _format_docs(
+  docs: List[Any],
+  cve_links: Optional[Dict[str, Tuple[List[Any], List[Any]]]] = None,
+) -> List[Dict[str, Any]]:
   """Prepare retrieved vulnerability documents and deduplicate by CVE."""
   context_list: List[Dict[str, Any]] = []
   seen_cves = set()
+  cve_links = cve_links or {}
 
   for doc in docs or []:
     metadata = getattr(doc, "metadata", {}) or {}
@@ -79,15 +183,12 @@ def _format_docs(docs: List[Any]) -> List[Dict[str, Any]]:
       continue
 
     seen_cves.add(cve_id)
-    try:
-      exploits = json.loads(metadata.get("exploits_json", "[]"))
-    except Exception:
-      exploits = []
-
-    try:
-      fixes = json.loads(metadata.get("fixes_json", "[]"))
-    except Exception:
-      fixes = []
+    links = cve_links.get(cve_id)
+    if links:
+      exploits, fixes = links
+    else:
+      exploits = _parse_json_list(metadata.get("exploits_json"))
+      fixes = _parse_json_list(metadata.get("fixes_json"))
 
     context_list.append(
       {
@@ -103,7 +204,18 @@ def _format_docs(docs: List[Any]) -> List[Dict[str, Any]]:
   return context_list
 
 
-def _build_runtime_context(runtime_data: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+WEB_SERVICES = frozenset({"http", "https", "http-proxy"})
+
+
+def _normalize_services(services: Optional[Dict[Any, Any]]) -> Dict[str, str]:
+  """Map port (as str) -> lower-cased service name, once per services dict."""
+  return {str(port): str(service).lower() for port, service in (services or {}).items()}
+
+
+def _build_runtime_context(
+  runtime_data: Optional[Dict[str, Any]],
+  normalized_services: Optional[Dict[str, str]] = None,
+) -> Dict[str, Any]:
   """Correlate package info with runtime scanner findings (Python logic)."""
   runtime_data = runtime_data or {}
 
@@ -117,20 +229,16 @@ def _build_runtime_context(runtime_data: Optional[Dict[str, Any]]) -> Dict[str,
     "exploitable_vulnerabilities": [],
   }
 
-  network_info = runtime_data.get("network", {})
+  network_info = runtime_data.get("network") or {}
   open_ports = network_info.get("open_ports", [])
-  services = network_info.get("services", {})
+  services = normalized_services if normalized_services is not None else _normalize_services(network_info.get("services"))
 
-  web_ports = [
-    port
-    for port in open_ports
-    if str(services.get(str(port), "")).lower() in {"http", "https", "http-proxy"}
-  ]
+  web_ports = [port for port in open_ports if services.get(str(port)) in WEB_SERVICES]
 
   if web_ports:
     context["is_exposed"] = True
     context["exposed_ports"] = web_ports
-    context["exposed_services"] = [services.get(str(port), "unknown") for port in web_ports]
+    context["exposed_services"] = [services[str(port)] for port in web_ports]
 
   return context
 
@@ -141,9 +249,11 @@ def _build_report(
   docs: List[Any],
   runtime_data: Optional[Dict[str, Any]] = None,
   is_exact_match: bool = False,
+  cve_links: Optional[Dict[str, Tuple[List[Any], List[Any]]]] = None,
+  normalized_services: Optional[Dict[str, str]] = None,
 ) -> Dict[str, Any]:
   """Combine RAG results with runtime exposure for downstream summarization."""
-  context_list = _format_docs(docs)
+  context_list = _format_docs(docs, cve_links)
 
   # Only use docs if this is an exact match for this package
   if not docs or not is_exact_match:
@@ -164,7 +274,7 @@ def _build_report(
       vuln_count = len(context_list)
       severities = sorted({item.get("severity", "UNKNOWN") for item in context_list if item.get("severity")})
 
-  runtime_context = _build_runtime_context(runtime_data)
+  runtime_context = _build_runtime_context(runtime_data, normalized_services)
   exploitable_vulns: List[str] = []
   if runtime_context["is_exposed"] and context_list:
     exploitable_vulns = [
@@ -199,6 +309,37 @@ def _build_report(
   }
 
 
+class _LRUCache:
+  """Small thread-safe LRU map used to memoise per-package lookups."""
+
+  def __init__(self, maxsize: int) -> None:
+    self.maxsize = maxsize
+    self._data: "OrderedDict[Any, Any]" = OrderedDict()
+    self._lock = threading.Lock()
+
+  def get(self, key: Any, default: Any = None) -> Any:
+    with self._lock:
+      if key not in self._data:
+        return default
+      self._data.move_to_end(key)
+      return self._data[key]
+
+  def put(self, key: Any, value: Any) -> None:
+    if self.maxsize <= 0:
+      return
+    with self._lock:
+      self._data[key] = value
+      self._data.move_to_end(key)
+      while len(self._data) > self.maxsize:
+        self._data.popitem(last=False)
+
+  def clear(self) -> int:
+    with self._lock:
+      size = len(self._data)
+      self._data.clear()
+      return size
+
+
 # ---------------------------------------------------------------------------
 # Vector store loader
 # ---------------------------------------------------------------------------
@@ -206,86 +347,222 @@ def _build_report(
 
 class VectorStoreService:
   def __init__(self) -> None:
-    self.persist_dir = Path(os.getenv("VECTORSTORE_DIR", DEFAULT_VECTOR_DIR))
-    self.collection_name = os.getenv("VECTOR_COLLECTION", "langchain")
-    self.embedding_model = os.getenv("VECTOR_EMBED_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+    settings = get_settings()
+    self.persist_dir = Path(settings.vector_dir)
+    self.collection_name = settings.vector_collection
+    # Lookups are pure w.r.t. (package, version) for a given store, so repeat
+    # packages across scans are served from memory.
+    self._cache = _LRUCache(settings.vector_cache_size)
+    # Package names with no documents at all (any version), so repeat misses skip the lookup
+    self._negative = _LRUCache(settings.vector_negative_cache_size)
+    self._cve_links: Dict[str, Tuple[List[Any], List[Any]]] = {}
+    # package_name -> docs, built from one full read of the collection. Disable
+    # with VECTOR_PREINDEX=0 for collections too large to hold in memory.
+    self.preindex = settings.vector_preindex
+    self._by_name: Optional[Dict[str, List[Any]]] = None
     self._store = None
     self._load()
 
   def _load(self) -> None:
-    if not Chroma or not HuggingFaceEmbeddings:
+    if not Chroma:
       LOGGER.warning("LangChain community packages are not installed; vector store unavailable.")
       return
 
-    if not self.persist_dir.exists():
+    if not os.path.isdir(self.persist_dir):
       LOGGER.warning("Vector store directory %s not found; RAG lookups will return UNKNOWN.", self.persist_dir)
       return
 
     LOGGER.info("Loading Chroma vector store from %s", self.persist_dir)
-    embeddings = HuggingFaceEmbeddings(model_name=self.embedding_model)
+    # Every lookup is a metadata get() or the in-memory index, never an ANN
+    # query, so no embedding model is loaded
     self._store = Chroma(
       collection_name=self.collection_name,
       persist_directory=str(self.persist_dir),
-      embedding_function=embeddings,
+      embedding_function=None,
     )
+    self._load_collection_index()
+
+  def _load_collection_index(self) -> None:
+    """
+    Read the collection once at startup: decode exploits_json/fixes_json per CVE
+    and (unless disabled) bucket every document by package_name.
+    """
+    include = ["metadatas", "documents"] if self.preindex else ["metadatas"]
+    try:
+      found = self._store._collection.get(include=include)
+    except Exception as exc:  # pragma: no cover - protective
+      LOGGER.warning("Could not index the vector store; falling back to per-request queries: %s", exc)
+      return
+
+    metadatas = found.get("metadatas") or []
+    for metadata in metadatas:
+      cve_id = (metadata or {}).get("cve_id")
+      if not cve_id or cve_id == "N/A" or cve_id in self._cve_links:
+        continue
+      self._cve_links[cve_id] = (
+        _parse_json_list(metadata.get("exploits_json")),
+        _parse_json_list(metadata.get("fixes_json")),
+      )
+    LOGGER.info("Pre-parsed exploit/fix links for %d CVEs", len(self._cve_links))
+
+    if self.preindex:
+      by_name: Dict[str, List[Any]] = defaultdict(list)
+      for metadata, content in zip(metadatas, found.get("documents") or []):
+        metadata = metadata or {}
+        by_name[metadata.get("package_name")].append(SimpleNamespace(metadata=metadata, page_content=content))
+      self._by_name = dict(by_name)
+      LOGGER.info("Indexed %d documents across %d packages", len(metadatas), len(self._by_name))
 
   @property
   def is_ready(self) -> bool:
     return self._store is not None
 
+  @property
+  def cve_links(self) -> Dict[str, Tuple[List[Any], List[Any]]]:
+    return self._cve_links
+
+  def clear_cache(self) -> int:
+    """Drop memoised lookups (call after the vector store is rebuilt)."""
+    return self._cache.clear() + self._negative.clear()
+
   def similarity_search(
     self,
-    query: str,
     package_name: str,
     package_version: str,
     k: int = 100,
-  ) -> tuple[List[Any], bool]:
+  ) -> Tuple[List[Any], bool]:
     """
     Search for package vulnerabilities.
     Returns: (docs, is_exact_match) - is_exact_match is True only if we found docs for this specific package.
     """
-    if not self._store:
-      return [], False
+    pair = (package_name, package_version)
+    return self.similarity_search_batch([pair], k_per_pkg=k)[pair]
 
-    LOGGER.info(f"Searching RAG for: {package_name} {package_version}")
-    
-    try:
-      # Try exact match first (name + version)
-      filter_exact = {"$and": [{"package_name": package_name}, {"package_version": package_version}]}
-      docs = self._store.similarity_search(query, k=k, filter=filter_exact)
-      
-      # Verify the returned docs actually match (Chroma can sometimes return wrong results)
-      verified_docs = [
-        doc for doc in docs 
-        if getattr(doc, "metadata", {}).get("package_name") == package_name
-      ]
-      
-      if verified_docs:
-        LOGGER.info(f"✅ Found {len(verified_docs)} documents for {package_name} {package_version} (exact match)")
-        return verified_docs, True
-      
-      # Fallback: Try searching by package name only (version might be different in DB)
-      LOGGER.info(f"⚠️  No exact match for {package_name} {package_version}. Trying package name only...")
-      filter_name_only = {"package_name": package_name}
-      docs = self._store.similarity_search(query, k=k, filter=filter_name_only)
-      
-      # Verify again - only keep docs that actually match the package name
-      verified_docs = [
-        doc for doc in docs 
-        if getattr(doc, "metadata", {}).get("package_name") == package_name
-      ]
-      
-      if verified_docs:
-        LOGGER.info(f"✅ Found {len(verified_docs)} documents for {package_name} (any version)")
-        return verified_docs, True
-
-      # No match found
-      LOGGER.warning(f"❌ No results for {package_name} {package_version} in database")
-      return [], False
+  def similarity_search_batch(
+    self,
+    pairs: List[Tuple[str, str]],
+    k_per_pkg: int = 100,
+  ) -> Dict[Tuple[str, str], Tuple[List[Any], bool]]:
+    """
+    Fetch vulnerabilities for many packages with a single Chroma metadata query.
+    Returns: {(package, version): (docs, is_exact_match)} for every input pair.
+
+    The package filter is exact, so this skips ANN ranking entirely: docs come
+    from the in-memory package index when it was built at load time, otherwise
+    from Chroma metadata queries (exact name+version first, then name only for
+    the pairs that had no exact docs). Either way at most k_per_pkg docs are
+    returned per pair.
+    """
+    results: Dict[Tuple[str, str], Tuple[List[Any], bool]] = {pair: ([], False) for pair in pairs}
+    if not self._store or not results:
+      return results
+
+    misses = []
+    for pair in results:
+      package_name = pair[0]
+      # Names that can't be in the store (or already missed) go straight to UNKNOWN
+      if not _is_plausible_package_name(package_name) or self._negative.get(package_name):
+        continue
+      cached = self._cache.get(pair)
+      if cached is None:
+        misses.append(pair)
+      else:
+        results[pair] = cached
+
+    if not misses:
+      return results
+
+    if self._by_name is not None:
+      candidates = {pair: self._by_name.get(pair[0], []) for pair in misses}
+    else:
+      candidates = self._query_docs(misses, k_per_pkg)
+      if candidates is None:
+        return results
+
+    for package_name, package_version in misses:
+      docs_for_pair, is_exact_match = _select_package_docs(
+        candidates.get((package_name, package_version), []), package_name, package_version, k_per_pkg
+      )
+      # Tuples so cached docs can't be mutated by a caller
+      entry = (tuple(docs_for_pair), is_exact_match)
+      self._cache.put((package_name, package_version), entry)
+      results[(package_name, package_version)] = entry
+      if not docs_for_pair:
+        self._negative.put(package_name, True)
+
+    return results
+
+  def _query_docs(
+    self, pairs: List[Tuple[str, str]], k_per_pkg: int
+  ) -> Optional[Dict[Tuple[str, str], List[Any]]]:
+    """
+    Fetch candidate docs for each pair from Chroma (used when not pre-indexed).
 
+    One query fetches the exact name+version docs for every pair; only pairs
+    with none get a name-only query, each with its own k_per_pkg limit so one
+    large package can't crowd out the others.
+    """
+    LOGGER.info("Searching RAG for %d package(s)", len(pairs))
+
+    exact_filters = [{"$and": [{"package_name": name}, {"package_version": version}]} for name, version in pairs]
+    try:
+      exact = self._get_docs(exact_filters[0] if len(exact_filters) == 1 else {"$or": exact_filters})
+      candidates: Dict[Tuple[str, str], List[Any]] = defaultdict(list)
+      for doc in exact:
+        metadata = doc.metadata
+        candidates[(metadata.get("package_name"), metadata.get("package_version"))].append(doc)
+
+      for pair in pairs:
+        if pair in candidates:
+          del candidates[pair][k_per_pkg:]
+        else:
+          # Fallback: search by package name only (version might be different in DB)
+          candidates[pair] = [
+            doc for doc in self._get_docs({"package_name": pair[0]}, limit=k_per_pkg)
+            if doc.metadata.get("package_name") == pair[0]
+          ]
     except Exception as exc:  # pragma: no cover - protective
-      LOGGER.error("Vector search failed for %s:%s -> %s", package_name, package_version, exc)
-      return [], False
+      LOGGER.error("Vector search failed for %d package(s) -> %s", len(pairs), exc)
+      return None
+    return candidates
+
+  def _get_docs(self, where: Dict[str, Any], limit: Optional[int] = None) -> List[Any]:
+    """Run one Chroma metadata query and wrap the rows like LangChain Documents."""
+    found = self._store._collection.get(where=where, limit=limit, include=["metadatas", "documents"])
+    # Lightweight stand-ins for LangChain Documents; _format_docs only needs .metadata
+    return [
+      SimpleNamespace(metadata=metadata or {}, page_content=content)
+      for metadata, content in zip(found.get("metadatas") or [], found.get("documents") or [])
+    ]
+
+
+def _is_plausible_package_name(package_name: str) -> bool:
+  """Reject names that can never match a distro/library package in the store."""
+  # "/" alone is fine (composer/npm names such as drupal/core); only path-like input is rejected
+  return (
+    bool(package_name)
+    and len(package_name) <= 128
+    and not package_name.startswith("/")
+    and ".." not in package_name
+  )
+
+
+def _select_package_docs(
+  docs: List[Any], package_name: str, package_version: str, k: int
+) -> Tuple[List[Any], bool]:
+  """Prefer docs for the exact version; fall back to any version of the package. At most k are kept."""
+  exact_docs = [doc for doc in docs if getattr(doc, "metadata", {}).get("package_version") == package_version][:k]
+  if exact_docs:
+    LOGGER.info(f"✅ Found {len(exact_docs)} documents for {package_name} {package_version} (exact match)")
+    return exact_docs, True
+
+  if docs:
+    docs = docs[:k]
+    LOGGER.info(f"✅ Found {len(docs)} documents for {package_name} (any version)")
+    return docs, True
+
+  LOGGER.warning(f"❌ No results for {package_name} {package_version} in database")
+  return [], False
 
 
 # ---------------------------------------------------------------------------
@@ -293,15 +570,35 @@ class VectorStoreService:
 # ---------------------------------------------------------------------------
 
 
+def _attention_implementation() -> str:
+  """FlashAttention-2 when flash-attn is installed and a GPU is present, else PyTorch SDPA."""
+  if torch and torch.cuda.is_available() and importlib.util.find_spec("flash_attn") is not None:
+    return "flash_attention_2"
+  return "sdpa"
+
+
+def _inference_mode() -> Any:
+  return torch.inference_mode() if torch else contextlib.nullcontext()
+
+
 class LocalLLM:
   def __init__(self) -> None:
-    self.model_path = os.getenv("MISTRAL_MODEL_PATH", str(DEFAULT_MODEL_DIR))
-    self.max_new_tokens = int(os.getenv("MISTRAL_MAX_NEW_TOKENS", "512"))
-    self.temperature = float(os.getenv("MISTRAL_TEMPERATURE", "0.2"))
-    self.quantization = os.getenv("MISTRAL_QUANTIZATION", "4bit").lower()
-    self.device = os.getenv("MISTRAL_DEVICE_MAP", "auto")
-    self.enabled = os.getenv("MISTRAL_DISABLE", "false").lower() not in {"1", "true", "yes"}
+    settings = get_settings()
+    self.model_path = settings.mistral_model_path
+    self.max_new_tokens = settings.mistral_max_new_tokens
+    self.temperature = settings.mistral_temperature
+    self.quantization = settings.mistral_quantization
+    self.device = settings.mistral_device_map
+    self.batch_size = settings.mistral_batch_size
+    # CLEAN/UNKNOWN reports already carry a good canned summary; don't spend a generate on them
+    self.summarize_statuses = settings.mistral_summarize_statuses
+    self.enabled = settings.mistral_enabled
+    self.backend = settings.mistral_backend
+    self.max_model_len = settings.mistral_max_model_len
     self._pipeline = None
+    self._engine = None
+    # Routes run in a threadpool; the pipeline/engine must not be driven concurrently
+    self._lock = threading.Lock()
 
     if self.enabled:
       self._load()
@@ -315,17 +612,25 @@ class LocalLLM:
       "quantization": self.quantization if self.enabled else "disabled",
       "max_new_tokens": self.max_new_tokens,
       "temperature": self.temperature,
-      "loaded": self._pipeline is not None,
+      "backend": self.backend,
+      "loaded": self._pipeline is not None or self._engine is not None,
     }
 
   def _load(self) -> None:
+    if self.backend == "vllm":
+      if VLLMEngine:
+        self._load_vllm()
+        return
+      LOGGER.warning("vLLM not installed; using the transformers pipeline instead.")
+      self.backend = "hf"
+
     if not AutoTokenizer or not AutoModelForCausalLM or not pipeline:
       LOGGER.warning("Transformers not installed; falling back to structured summaries.")
       self.enabled = False
       return
 
-    model_path = Path(self.model_path)
-    if not model_path.exists():
+    model_path = self.model_path
+    if not os.path.isdir(model_path):
       LOGGER.error("Model directory %s not found; cannot load LLM.", model_path)
       self.enabled = False
       return
@@ -333,20 +638,34 @@ class LocalLLM:
     LOGGER.info("Loading Mistral LLM from %s (quant=%s)", model_path, self.quantization)
 
     tokenizer = AutoTokenizer.from_pretrained(model_path, trust_remote_code=True)
-    loader_kwargs: Dict[str, Any] = {"trust_remote_code": True}
+    # Left padding so batched prompts all end right where generation starts
+    tokenizer.padding_side = "left"
+    if tokenizer.pad_token is None:
+      tokenizer.pad_token = tokenizer.eos_token
+    loader_kwargs: Dict[str, Any] = {
+      "trust_remote_code": True,
+      "attn_implementation": _attention_implementation(),
+    }
 
-    if self.quantization == "4bit" and BitsAndBytesConfig:
+    if self.quantization in {"awq", "gptq"}:
+      # Prequantized checkpoint (needs autoawq / auto-gptq); the quantization
+      # config ships inside the snapshot, so from_pretrained picks the int4 kernels.
+      loader_kwargs["torch_dtype"] = torch.float16 if torch else None
+      loader_kwargs["device_map"] = self.device
+    elif self.quantization == "4bit" and BitsAndBytesConfig:
       loader_kwargs["quantization_config"] = BitsAndBytesConfig(
         load_in_4bit=True,
         bnb_4bit_compute_dtype=torch.float16 if torch else None,
         bnb_4bit_use_double_quant=True,
         bnb_4bit_quant_type="nf4",
       )
+      loader_kwargs["torch_dtype"] = torch.float16 if torch else None
       loader_kwargs["device_map"] = self.device
     else:
       loader_kwargs["device_map"] = self.device
 
     model = AutoModelForCausalLM.from_pretrained(model_path, **loader_kwargs)
+    model.eval()
 
     self._pipeline = pipeline(
       "text-generation",
@@ -356,19 +675,63 @@ class LocalLLM:
       temperature=self.temperature,
       repetition_penalty=1.1,
       pad_token_id=tokenizer.eos_token_id,
+      # Return only the completion, not the echoed prompt
+      return_full_text=False,
+    )
+
+  def _load_vllm(self) -> None:
+    model_path = self.model_path
+    if not os.path.isdir(model_path):
+      LOGGER.error("Model directory %s not found; cannot load LLM.", model_path)
+      self.enabled = False
+      return
+
+    quantization = self.quantization if self.quantization in {"awq", "gptq"} else None
+    LOGGER.info("Loading Mistral LLM from %s via vLLM (quant=%s)", model_path, quantization or "none")
+    self._engine = VLLMEngine(
+      model=model_path,
+      quantization=quantization,
+      dtype="float16",
+      max_model_len=self.max_model_len,
+    )
+    self._sampling_params = SamplingParams(
+      max_tokens=self.max_new_tokens,
+      temperature=self.temperature,
+      repetition_penalty=1.1,
     )
 
   def invoke(self, prompt: str) -> str:
+    return self.invoke_many([prompt])[0]
+
+  def invoke_many(self, prompts: List[str]) -> List[str]:
+    """Generate completions for several prompts in padded pipeline batches."""
+    if not prompts:
+      return []
+    if self._engine is not None:
+      try:
+        # vLLM schedules the whole list with continuous batching + paged KV cache
+        with self._lock:
+          outputs = self._engine.generate(prompts, self._sampling_params, use_tqdm=False)
+      except Exception as exc:  # pragma: no cover
+        LOGGER.error("LLM invocation failed: %s", exc)
+        return ["LLM invocation failed"] * len(prompts)
+      return [output.outputs[0].text.strip() if output.outputs else "" for output in outputs]
+
     if not self.enabled or not self._pipeline:
-      return "LLM unavailable"
+      return ["LLM unavailable"] * len(prompts)
 
     try:
-      output = self._pipeline(prompt, do_sample=self.temperature > 0)[0]["generated_text"]
-      # Only keep the content after the prompt (if pipeline echoes prompt)
-      return output.split(prompt, 1)[-1].strip() if prompt in output else output.strip()
+      with self._lock, _inference_mode():
+        outputs = self._pipeline(
+          prompts,
+          batch_size=min(len(prompts), self.batch_size),
+          do_sample=self.temperature > 0,
+        )
     except Exception as exc:  # pragma: no cover
       LOGGER.error("LLM invocation failed: %s", exc)
-      return "LLM invocation failed"
+      return ["LLM invocation failed"] * len(prompts)
+
+    return [output[0]["generated_text"].strip() for output in outputs]
 
 
 # ---------------------------------------------------------------------------
@@ -447,10 +810,15 @@ class AnalysisResponse(BaseModel):
 # ---------------------------------------------------------------------------
 
 
-app = FastAPI(title="ArmourEye AI Inference Service", version="1.0.0")
+app = FastAPI(
+  title="ArmourEye AI Inference Service",
+  version="1.0.0",
+  # Bulk /v1/analyze responses carry hundreds of CVE dicts; orjson encodes them far faster.
+  default_response_class=ORJSONResponse if orjson else JSONResponse,
+)
 app.add_middleware(
   CORSMiddleware,
-  allow_origins=os.getenv("AI_CORS_ALLOW_ORIGINS", "*").split(","),
+  allow_origins=get_settings().cors_allow_origins,
   allow_credentials=True,
   allow_methods=["*"],
   allow_headers=["*"],
@@ -474,56 +842,155 @@ async def health() -> Dict[str, Any]:
   }
 
 
-@app.post("/v1/analyze", response_model=AnalysisResponse)
-async def analyze_packages(request: AnalysisRequest) -> AnalysisResponse:
+@app.post("/v1/cache/clear")
+async def clear_cache() -> Dict[str, Any]:
+  """Invalidate cached package lookups, e.g. after rebuilding the vector store."""
+  return {"status": "ok", "cleared": VECTOR_SERVICE.clear_cache()}
+
+
+@app.on_event("startup")
+async def _configure_threadpool() -> None:
+  # Analysis routes are sync (RAG + generate block), so FastAPI runs them in
+  # anyio's worker threads; size that pool for concurrent scans.
+  limiter = anyio.to_thread.current_default_thread_limiter()
+  limiter.total_tokens = get_settings().threadpool_size
+
+
+def _packages_to_process(request: AnalysisRequest) -> List[PackageInput]:
   if not request.packages:
     raise HTTPException(status_code=400, detail="At least one package is required.")
+  return request.packages[: request.options.max_packages] if request.options.max_packages else request.packages
 
-  summaries: List[PackageSummary] = []
-  packages_to_process = request.packages[: request.options.max_packages] if request.options.max_packages else request.packages
 
-  for package in packages_to_process:
-    runtime_context = request.runtime_defaults or {}
-    if package.runtime_context:
-      runtime_context = {**runtime_context, **package.runtime_context.dict(exclude_unset=True)}
+def _iter_package_summaries(
+  request: AnalysisRequest,
+  packages_to_process: List[PackageInput],
+  llm_batch_size: Optional[int] = None,
+) -> Iterator[Tuple[List[int], PackageSummary]]:
+  """
+  Yield (positions, summary) for every unique package in the request.
 
-    docs, is_exact_match = VECTOR_SERVICE.similarity_search(
-      query=f"status for {package.package} {package.version}",
-      package_name=package.package,
-      package_version=package.version,
-    )
+  Reports that don't need the LLM come out first; the rest follow one LLM
+  call of llm_batch_size prompts at a time (all prompts in one call when
+  None), so streaming clients get results as each mini-batch completes.
+  """
+  # Scans often list the same package several times; identical entries share
+  # one report + LLM summary which is fanned back out to every position.
+  positions_by_key: Dict[Tuple[str, str, Optional[str]], List[int]] = defaultdict(list)
+  for index, package in enumerate(packages_to_process):
+    positions_by_key[_package_key(package)].append(index)
+
+  rag_results = VECTOR_SERVICE.similarity_search_batch(
+    [(package, version) for package, version, _ in positions_by_key]
+  )
 
-    report = _build_report(package.package, package.version, docs, runtime_context, is_exact_match)
-    llm_summary = report["report_summary_text"]
-
-    if request.options.summarize_with_llm:
-      llm_output = LLM.invoke(_build_llm_prompt(report))
-      if llm_output and llm_output != "LLM unavailable":
-        llm_summary = llm_output
-
-    summaries.append(
-      PackageSummary(
-        package=report["package"],
-        version=report["version"],
-        status=report["status"],
-        unique_vuln_count=report["unique_vuln_count"],
-        severities_found=report["severities_found"],
-        runtime_exposure=report["runtime_exposure"],
-        exploitable_count=report["exploitable_count"],
-        llm_summary=llm_summary,
-        structured_report=report,
-      )
+  # Read-only view shared by every package that has no overrides of its own
+  runtime_defaults = MappingProxyType(request.runtime_defaults or {})
+  # Most packages inherit the target-wide network info; normalise it once.
+  default_services = _normalize_services((runtime_defaults.get("network") or {}).get("services"))
+
+  reports: List[Tuple[List[int], Dict[str, Any]]] = []
+  for positions in positions_by_key.values():
+    package = packages_to_process[positions[0]]
+    runtime_context = runtime_defaults
+    services = default_services
+    if package.runtime_context:
+      overrides = package.runtime_context.model_dump(exclude_unset=True, mode="python")
+      runtime_context = {**runtime_defaults, **overrides}
+      if "network" in overrides:
+        services = None
+
+    docs, is_exact_match = rag_results[(package.package, package.version)]
+
+    report = _build_report(
+      package.package,
+      package.version,
+      docs,
+      runtime_context,
+      is_exact_match,
+      cve_links=VECTOR_SERVICE.cve_links,
+      normalized_services=services,
     )
+    reports.append((positions, report))
+
+  pending: List[Tuple[List[int], Dict[str, Any]]] = []
+  for positions, report in reports:
+    if request.options.summarize_with_llm and report["status"] in LLM.summarize_statuses:
+      pending.append((positions, report))
+    else:
+      yield positions, _package_summary(report, None)
+
+  # Batched generate calls instead of a prompt at a time
+  step = llm_batch_size or len(pending) or 1
+  for start in range(0, len(pending), step):
+    batch = pending[start : start + step]
+    generated = LLM.invoke_many([_build_llm_prompt(report) for _, report in batch])
+    for (positions, report), llm_output in zip(batch, generated):
+      yield positions, _package_summary(report, llm_output)
+
+
+def _package_summary(report: Dict[str, Any], llm_output: Optional[str]) -> PackageSummary:
+  llm_summary = report["report_summary_text"]
+  if llm_output and llm_output != "LLM unavailable":
+    llm_summary = llm_output
+
+  # Fields come straight from _build_report, so skip re-validating the nested report dicts
+  return PackageSummary.model_construct(
+    package=report["package"],
+    version=report["version"],
+    status=report["status"],
+    unique_vuln_count=report["unique_vuln_count"],
+    severities_found=report["severities_found"],
+    runtime_exposure=report["runtime_exposure"],
+    exploitable_count=report["exploitable_count"],
+    llm_summary=llm_summary,
+    structured_report=report,
+  )
+
 
-  return AnalysisResponse(
+@app.post("/v1/analyze", response_model=AnalysisResponse)
+def analyze_packages(request: AnalysisRequest) -> AnalysisResponse:
+  packages_to_process = _packages_to_process(request)
+
+  summaries: List[Optional[PackageSummary]] = [None] * len(packages_to_process)
+  for positions, summary in _iter_package_summaries(request, packages_to_process):
+    for index in positions:
+      summaries[index] = summary
+
+  return AnalysisResponse.model_construct(
     target=request.target,
     model=LLM.info,
     packages=summaries,
   )
 
 
+@app.post("/v1/analyze/stream")
+def analyze_packages_stream(request: AnalysisRequest) -> StreamingResponse:
+  """
+  Same analysis as /v1/analyze, streamed as NDJSON: one line per package,
+  {"index": <position in request.packages>, ...PackageSummary}, in completion order.
+  """
+  packages_to_process = _packages_to_process(request)
+
+  def lines() -> Iterator[bytes]:
+    for positions, summary in _iter_package_summaries(request, packages_to_process, LLM.batch_size):
+      payload = summary.model_dump()
+      for index in positions:
+        yield _dumps_line({"index": index, **payload})
+
+  return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+def _package_key(package: PackageInput) -> Tuple[str, str, Optional[str]]:
+  """Identity of a package entry for in-request deduplication."""
+  runtime_key = None
+  if package.runtime_context:
+    runtime_key = json.dumps(package.runtime_context.model_dump(exclude_unset=True, mode="python"), sort_keys=True, default=str)
+  return (package.package, package.version, runtime_key)
+
+
 @app.post("/analyze")
-async def analyze_single_package(request: PackageInput) -> Dict[str, Any]:
+def analyze_single_package(request: PackageInput) -> Dict[str, Any]:
   """
   Backwards-compatible single-package route used by legacy AI clients.
   Wraps the /v1/analyze logic but only returns structured_report + llm_summary.
@@ -534,7 +1001,7 @@ async def analyze_single_package(request: PackageInput) -> Dict[str, Any]:
     runtime_defaults={},
     options=AnalysisOptions(summarize_with_llm=request.summarize_with_llm),
   )
-  result = await analyze_packages(analysis_request)
+  result = analyze_packages(analysis_request)
   first_package = result.packages[0]
   return {
     "structured_report": first_package.structured_report,
@@ -542,6 +1009,17 @@ async def analyze_single_package(request: PackageInput) -> Dict[str, Any]:
   }
 
 
+_PROMPT_INSTRUCTION = (
+  "### Instruction:\n"
+  "Write a brief, friendly security summary (2-3 sentences max). Be direct and helpful.\n"
+  "- If vulnerable: mention the most critical issue and one key action.\n"
+  "- If clean: confirm it's safe, keep it short.\n"
+  "- Skip technical jargon. Write like you're explaining to a developer.\n"
+  "- Only mention runtime/network info if ports are actually exposed.\n\n"
+)
+_PROMPT_RESPONSE_HEADER = "### Response (2-3 sentences, friendly tone):\n"
+
+
 def _build_llm_prompt(report: Dict[str, Any]) -> str:
   """Generate a friendly, concise prompt for Mistral summarization."""
   # Extract key info for a focused prompt
@@ -576,18 +1054,13 @@ def _build_llm_prompt(report: Dict[str, Any]) -> str:
     runtime_info += f" {len(exploitable)} CVE(s) are exploitable due to runtime exposure."
   
   return (
-    "### Instruction:\n"
-    "Write a brief, friendly security summary (2-3 sentences max). Be direct and helpful.\n"
-    "- If vulnerable: mention the most critical issue and one key action.\n"
-    "- If clean: confirm it's safe, keep it short.\n"
-    "- Skip technical jargon. Write like you're explaining to a developer.\n"
-    "- Only mention runtime/network info if ports are actually exposed.\n\n"
-    f"### Package: {pkg}@{ver}\n"
+    _PROMPT_INSTRUCTION
+    + f"### Package: {pkg}@{ver}\n"
     f"Status: {status}\n"
     f"Vulnerabilities: {vuln_count} found (Severities: {', '.join(severities) if severities else 'None'})\n"
     f"{f'Top issues:{chr(10)}{vuln_summary}' if vuln_summary else ''}\n"
     f"{runtime_info}\n\n"
-    "### Response (2-3 sentences, friendly tone):\n"
+    + _PROMPT_RESPONSE_HEADER
   )
 
 
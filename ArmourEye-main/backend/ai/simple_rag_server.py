@@ -12,26 +12,51 @@ Lightweight RAG-only FastAPI service for ArmourEye AI Insights.
 - Exposes the endpoints expected by the Node backend / GUI:
     - GET /health
     - POST /analyze  (body: { "package_name": str, "version": str })
+    - POST /analyze/stream  (same body; NDJSON {"token"} lines, then {"report"})
 
 To run it:
   cd ArmourEye-main
   python backend/ai/simple_rag_server.py
 
+or, with several workers sharing the loaded data (see gunicorn.conf.py):
+  gunicorn -c backend/ai/gunicorn.conf.py backend.ai.simple_rag_server:app
+
 Make sure the Node backend is running as usual; the AI settings default local URL
 is http://localhost:8000, which matches this server.
 """
 
 from __future__ import annotations
 
+import contextlib
+import copy
+import heapq
+import importlib.util
 import json
 import logging
+import mmap
+import multiprocessing
 import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from types import SimpleNamespace
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
+import anyio.to_thread
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.responses import JSONResponse, ORJSONResponse, StreamingResponse
+from pydantic import BaseModel, ConfigDict, Field
+
+# Optional fast JSON parser (the stdlib json module is used when missing)
+try:
+    import orjson  # type: ignore
+except Exception:  # pragma: no cover - optional dependency
+    orjson = None  # type: ignore
 
 # Optional vector store deps
 try:
@@ -41,6 +66,26 @@ except Exception:  # pragma: no cover - optional dependency
     Chroma = None  # type: ignore
     HuggingFaceEmbeddings = None  # type: ignore
 
+# Optional exact-search backend (see build_faiss_index.py)
+try:
+    import faiss  # type: ignore
+    import numpy as np  # type: ignore
+except Exception:  # pragma: no cover - optional dependency
+    faiss = None  # type: ignore
+    np = None  # type: ignore
+
+# Optional AWQ INT4 loader (MISTRAL_QUANTIZATION=awq)
+try:
+    from awq import AutoAWQForCausalLM  # type: ignore
+except Exception:  # pragma: no cover - optional dependency
+    AutoAWQForCausalLM = None  # type: ignore
+
+# Optional JIT for the severity ranking loop
+try:
+    from numba import njit  # type: ignore
+except Exception:  # pragma: no cover - optional dependency
+    njit = None  # type: ignore
+
 # Optional local LLM deps
 try:
     import torch  # type: ignore
@@ -48,6 +93,7 @@ try:
         AutoModelForCausalLM,
         AutoTokenizer,
         BitsAndBytesConfig,
+        TextIteratorStreamer,
         pipeline,
     )
 except Exception:  # pragma: no cover - optional dependency
@@ -55,6 +101,7 @@ except Exception:  # pragma: no cover - optional dependency
     AutoModelForCausalLM = None  # type: ignore
     AutoTokenizer = None  # type: ignore
     BitsAndBytesConfig = None  # type: ignore
+    TextIteratorStreamer = None  # type: ignore
     pipeline = None  # type: ignore
 
 
@@ -65,6 +112,23 @@ logging.basicConfig(
 LOGGER = logging.getLogger("armoureye.simple_rag")
 
 
+# Both accept bytes or str, so raw file lines can be parsed without decoding first
+_json_loads = orjson.loads if orjson else json.loads
+
+
+def _parse_json_list(raw: Optional[str]) -> List[Any]:
+    try:
+        return _json_loads(raw or "[]")
+    except Exception:
+        return []
+
+
+def _json_dumps(obj: Any) -> bytes:
+    if orjson:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
 # ---------------------------------------------------------------------------
 # Paths
 # ---------------------------------------------------------------------------
@@ -73,10 +137,15 @@ LOGGER = logging.getLogger("armoureye.simple_rag")
 BASE_DIR = Path(__file__).resolve().parents[1]  # .../backend
 PROJECT_ROOT = BASE_DIR.parents[1]  # .../ArmourEye-main
 VECTOR_DIR = BASE_DIR / "ai" / "vectorestore" / "chroma_db_v2"
+FAISS_DIR = BASE_DIR / "ai" / "vectorestore" / "faiss_v2"
+QUERY_CACHE_DIR = BASE_DIR / "ai" / "vectorestore" / "query_cache"
 # Primary dataset path (local copy in this workspace)
 MASTER_DATASET_PATH = PROJECT_ROOT / "MASTER_package_dataset_validated.jsonl"
 
 
+SEVERITY_CODES = {"CRITICAL": 3, "HIGH": 2, "MEDIUM": 1, "LOW": 0}
+
+
 # ---------------------------------------------------------------------------
 # Vector store loader
 # ---------------------------------------------------------------------------
@@ -92,7 +161,21 @@ class VectorStoreService:
         self.embedding_model = os.getenv(
             "VECTOR_EMBED_MODEL", "sentence-transformers/all-MiniLM-L6-v2"
         )
+        # "chroma" (default) or "faiss" for an exact IndexFlatIP export of the same corpus
+        self.backend = os.getenv("VECTOR_BACKEND", "chroma").lower()
+        self.faiss_dir = Path(os.getenv("VECTOR_FAISS_DIR", FAISS_DIR))
         self._store = None
+        self._store_pid = None
+        self._store_lock = threading.Lock()
+        self._faiss = None
+        # Chroma id -> doc stand-in, so queries only need to return ids
+        self._docs_by_id: Dict[str, Any] = {}
+        # cve_id -> (exploits, fixes), decoded once from exploits_json/fixes_json
+        self.cve_links: Dict[str, Tuple[List[Any], List[Any]]] = {}
+        # query string -> row in a precomputed embedding matrix (see _precompute_query_vectors)
+        self.query_cache_dir = Path(os.getenv("VECTOR_QUERY_CACHE_DIR", QUERY_CACHE_DIR))
+        self._query_rows: Dict[str, int] = {}
+        self._query_vectors = None
         self._load()
 
     def _load(self) -> None:
@@ -102,6 +185,11 @@ class VectorStoreService:
             )
             return
 
+        if self.backend == "faiss":
+            if self._load_faiss():
+                return
+            LOGGER.warning("FAISS backend unavailable; falling back to Chroma.")
+
         if not self.persist_dir.exists():
             LOGGER.warning(
                 "Vector store directory %s not found; RAG lookups will return UNKNOWN.",
@@ -114,16 +202,247 @@ class VectorStoreService:
             self.persist_dir,
             self.collection_name,
         )
-        embeddings = HuggingFaceEmbeddings(model_name=self.embedding_model)
+        self._load_embeddings()
+        self._open_chroma()
+        try:
+            found = self._collection().get(include=["metadatas"])
+        except Exception as exc:  # pragma: no cover - safety
+            LOGGER.warning("Could not pre-parse CVE links; decoding per request instead: %s", exc)
+            return
+        metadatas = [metadata or {} for metadata in found.get("metadatas") or []]
+        self._index_cve_links(metadatas, drop_raw=True)
+        self._precompute_query_vectors(metadatas)
+        self._docs_by_id = {
+            doc_id: SimpleNamespace(metadata=metadata)
+            for doc_id, metadata in zip(found.get("ids") or [], metadatas)
+        }
+
+    def _open_chroma(self) -> None:
         self._store = Chroma(
             collection_name=self.collection_name,
             persist_directory=str(self.persist_dir),
-            embedding_function=embeddings,
+            embedding_function=self._embeddings,
         )
+        self._store_pid = os.getpid()
+
+    def _collection(self) -> Any:
+        # Chroma's SQLite handles must not cross fork(); preloaded gunicorn workers
+        # reopen their own (same pattern as MasterIndex._connection)
+        if self._store_pid != os.getpid():
+            with self._store_lock:
+                if self._store_pid != os.getpid():
+                    try:
+                        # chromadb caches one client per path in the process; drop the inherited one
+                        from chromadb.api.client import SharedSystemClient  # type: ignore
+
+                        SharedSystemClient.clear_system_cache()
+                    except Exception:  # pragma: no cover - older chromadb
+                        pass
+                    self._open_chroma()
+        return self._store._collection
+
+    def _index_cve_links(self, metadatas: List[Dict[str, Any]], drop_raw: bool = False) -> None:
+        for metadata in metadatas:
+            if not metadata:
+                continue
+            cve_id = metadata.get("cve_id")
+            if cve_id and cve_id != "N/A" and cve_id not in self.cve_links:
+                self.cve_links[cve_id] = (
+                    _parse_json_list(metadata.get("exploits_json")),
+                    _parse_json_list(metadata.get("fixes_json")),
+                )
+            if drop_raw and cve_id in self.cve_links:
+                # In-memory docs don't need the raw strings once parsed
+                metadata.pop("exploits_json", None)
+                metadata.pop("fixes_json", None)
+        LOGGER.info("Pre-parsed exploit/fix links for %d CVEs", len(self.cve_links))
+
+    def _precompute_query_vectors(self, metadatas: List[Dict[str, Any]]) -> None:
+        """
+        Embed the fixed query strings /analyze sends for every (package, version)
+        in the store, once, and persist them (query_emb.npy + query_keys.json)
+        so those lookups never run the embedding model at request time.
+        """
+        if np is None:
+            return
+
+        pairs = sorted(
+            {
+                (metadata.get("package_name"), metadata.get("package_version"))
+                for metadata in metadatas
+                if metadata and metadata.get("package_name") and metadata.get("package_version")
+            }
+        )
+        # Only the filtered queries; the broad "{name} {ver}" fallback runs only for
+        # names that aren't in the store, so a vector for a stored pair is never used
+        queries = [f"status for {name} {ver}" for name, ver in pairs]
+        if not queries:
+            return
+
+        vectors_path = self.query_cache_dir / "query_emb.npy"
+        keys_path = self.query_cache_dir / "query_keys.json"
+        try:
+            if vectors_path.exists() and keys_path.exists():
+                with keys_path.open("rb") as f:
+                    cached_keys = _json_loads(f.read())
+                if cached_keys == queries:
+                    self._query_vectors = np.load(vectors_path, mmap_mode="r")
+                    self._query_rows = {q: row for row, q in enumerate(queries)}
+                    LOGGER.info("Loaded %d precomputed query embeddings", len(queries))
+                    return
+
+            LOGGER.info("Precomputing %d query embeddings", len(queries))
+            batch_size = 256
+            chunks = [
+                self._embeddings.embed_documents(queries[start : start + batch_size])
+                for start in range(0, len(queries), batch_size)
+            ]
+            vectors = np.asarray([vec for chunk in chunks for vec in chunk], dtype=np.float32)
+            self.query_cache_dir.mkdir(parents=True, exist_ok=True)
+            np.save(vectors_path, vectors)
+            keys_path.write_bytes(_json_dumps(queries))
+            self._query_vectors = np.load(vectors_path, mmap_mode="r")
+            self._query_rows = {q: row for row, q in enumerate(queries)}
+        except Exception as exc:  # pragma: no cover - safety
+            LOGGER.warning("Could not precompute query embeddings; embedding per request: %s", exc)
+            self._query_vectors = None
+            self._query_rows = {}
+
+    def _query_vector(self, query: str) -> Any:
+        row = self._query_rows.get(query)
+        if row is not None:
+            return self._query_vectors[row].tolist()
+        return self._embed_query(query)
+
+    def _load_embeddings(self) -> Any:
+        # MiniLM is small enough to share the GPU with the LLM; the default is CPU
+        device = os.getenv("VECTOR_EMBED_DEVICE") or (
+            "cuda" if torch is not None and torch.cuda.is_available() else "cpu"
+        )
+        embeddings = HuggingFaceEmbeddings(
+            model_name=self.embedding_model,
+            model_kwargs={"device": device},
+            # Unit-length vectors, so inner-product search needs no renormalisation
+            encode_kwargs={"normalize_embeddings": True, "batch_size": 64},
+        )
+        LOGGER.info("Embedding model %s on %s", self.embedding_model, device)
+        self._embeddings = embeddings
+        # Encoding the query through MiniLM dominates lookup cost; repeat queries reuse it
+        self._embed_query = lru_cache(
+            maxsize=int(os.getenv("VECTOR_EMBED_CACHE_SIZE", "4096"))
+        )(embeddings.embed_query)
+        return embeddings
+
+    def _load_faiss(self) -> bool:
+        if faiss is None or np is None:
+            LOGGER.warning("faiss/numpy not installed; cannot use VECTOR_BACKEND=faiss.")
+            return False
+
+        index_path = self.faiss_dir / "index.faiss"
+        docs_path = self.faiss_dir / "docs.jsonl"
+        if not index_path.exists() or not docs_path.exists():
+            LOGGER.warning(
+                "FAISS index not found in %s; run backend/ai/build_faiss_index.py first.",
+                self.faiss_dir,
+            )
+            return False
+
+        LOGGER.info("Loading FAISS index from %s", self.faiss_dir)
+        self._load_embeddings()
+        index = faiss.read_index(str(index_path))
+
+        # Row i of the index <-> line i of docs.jsonl
+        self._faiss_docs: List[Any] = []
+        ids_by_name: Dict[str, List[int]] = {}
+        ids_by_pair: Dict[Tuple[str, str], List[int]] = {}
+        with docs_path.open("rb") as f:
+            for row, line in enumerate(f):
+                rec = _json_loads(line)
+                metadata = rec.get("metadata") or {}
+                self._faiss_docs.append(
+                    SimpleNamespace(metadata=metadata, page_content=rec.get("document"))
+                )
+                ids_by_name.setdefault(metadata.get("package_name"), []).append(row)
+                ids_by_pair.setdefault(
+                    (metadata.get("package_name"), metadata.get("package_version")), []
+                ).append(row)
+
+        if len(self._faiss_docs) != index.ntotal:
+            LOGGER.error(
+                "FAISS index has %d vectors but %d docs; rebuild it.",
+                index.ntotal,
+                len(self._faiss_docs),
+            )
+            return False
+
+        self._index_cve_links([doc.metadata for doc in self._faiss_docs], drop_raw=True)
+        self._precompute_query_vectors([doc.metadata for doc in self._faiss_docs])
+        self._faiss_ids_by_name = {
+            name: np.asarray(ids, dtype=np.int64) for name, ids in ids_by_name.items()
+        }
+        self._faiss_ids_by_pair = {
+            pair: np.asarray(ids, dtype=np.int64) for pair, ids in ids_by_pair.items()
+        }
+        self._faiss = index
+        return True
 
     @property
     def is_ready(self) -> bool:
-        return self._store is not None
+        return self._store is not None or self._faiss is not None
+
+    def _query_faiss(self, query: str, k: int, where: Optional[Dict[str, Any]] = None) -> List[Any]:
+        vector = np.asarray([self._query_vector(query)], dtype=np.float32)
+        faiss.normalize_L2(vector)
+
+        params = None
+        if where:
+            # Same filter shapes as Chroma: {"package_name": ...} or an $and of name + version
+            conditions = {key: value for clause in where.get("$and", [where]) for key, value in clause.items()}
+            if "package_version" in conditions:
+                ids = self._faiss_ids_by_pair.get(
+                    (conditions.get("package_name"), conditions["package_version"])
+                )
+            else:
+                ids = self._faiss_ids_by_name.get(conditions.get("package_name"))
+            if ids is None:
+                return []
+            k = min(k, len(ids))
+            # Restrict the exact scan to this package's rows
+            params = faiss.SearchParameters(
+                sel=faiss.IDSelectorBatch(len(ids), faiss.swig_ptr(ids))
+            )
+
+        k = min(k, self._faiss.ntotal)
+        if k <= 0:
+            return []
+        _, rows = self._faiss.search(vector, k, params=params)
+        return [self._faiss_docs[row] for row in rows[0] if row >= 0]
+
+    def _query(self, query: str, k: int, where: Optional[Dict[str, Any]] = None) -> List[Any]:
+        """Run one vector query with a cached query embedding."""
+        if self._faiss is not None:
+            return self._query_faiss(query, k, where)
+
+        if self._docs_by_id:
+            # Ids only: metadata comes from the table loaded at startup, so Chroma
+            # doesn't fetch and serialise up to k metadata/document rows per call
+            found = self._collection().query(
+                query_embeddings=[self._query_vector(query)],
+                n_results=k,
+                where=where,
+                include=[],
+            )
+            ids = (found.get("ids") or [[]])[0]
+            return [self._docs_by_id[doc_id] for doc_id in ids if doc_id in self._docs_by_id]
+
+        found = self._collection().query(
+            query_embeddings=[self._query_vector(query)],
+            n_results=k,
+            where=where,
+            include=["metadatas"],
+        )
+        # Lightweight stand-ins for LangChain Documents; _format_docs only needs .metadata
+        return [SimpleNamespace(metadata=metadata or {}) for metadata in (found.get("metadatas") or [[]])[0]]
 
     def similarity_search(
         self,
@@ -132,7 +451,7 @@ class VectorStoreService:
         package_version: str,
         k: int = 100,
     ) -> List[Any]:
-        if not self._store:
+        if not self.is_ready:
             return []
 
         # 1) Try exact match on package name + version
@@ -142,14 +461,9 @@ class VectorStoreService:
                 {"package_version": package_version},
             ]
         }
-        LOGGER.info(
-            "RAG search for %s %s (exact filter=%s)",
-            package_name,
-            package_version,
-            filter_exact,
-        )
+        LOGGER.info("RAG search for %s %s (exact filter)", package_name, package_version)
         try:
-            docs = self._store.similarity_search(query, k=k, filter=filter_exact)
+            docs = self._query(query, k, where=filter_exact)
             if docs:
                 LOGGER.info("✅ Found %d docs for exact match %s %s", len(docs), package_name, package_version)
                 return docs
@@ -161,15 +475,12 @@ class VectorStoreService:
                 exc,
             )
 
-        # 2) Fallback: search by package name only (any version)
-        filter_name_only = {"package_name": package_name}
-        LOGGER.info(
-            "No exact match; trying name-only filter for %s (filter=%s)",
-            package_name,
-            filter_name_only,
-        )
+        # 2) Fallback: search by package name only (any version). A separate
+        #    query, so a package with more than k docs across versions can't push
+        #    the exact-version docs out of the results.
+        LOGGER.info("No exact match; trying name-only filter for %s", package_name)
         try:
-            docs = self._store.similarity_search(query, k=k, filter=filter_name_only)
+            docs = self._query(query, k, where={"package_name": package_name})
             if docs:
                 LOGGER.info("✅ Found %d docs for package name %s (any version)", len(docs), package_name)
                 return docs
@@ -187,9 +498,7 @@ class VectorStoreService:
             package_version,
         )
         try:
-            docs = self._store.similarity_search(
-                f"{package_name} {package_version}", k=min(5, k)
-            )
+            docs = self._query(f"{package_name} {package_version}", min(5, k))
             if docs:
                 LOGGER.info("✅ Found %d docs via broad similarity search", len(docs))
                 return docs
@@ -205,56 +514,266 @@ class VectorStoreService:
         return []
 
 
-VECTOR_SERVICE = VectorStoreService()
-
-
 # ---------------------------------------------------------------------------
 # Dataset loader (MASTER_package_dataset_validated.jsonl)
 # ---------------------------------------------------------------------------
 
 
-def _load_master_dataset(path: Path) -> Dict[str, Dict[str, Any]]:
+# Number of most severe vulnerabilities included in the LLM prompt
+LLM_TOP_VULNS = 3
+
+
+def _record_to_columns(rec: Dict[str, Any]) -> Dict[str, Any]:
     """
-    Load MASTER_package_dataset_validated.jsonl into an index:
+    Re-shape a dataset record from a list of per-vulnerability dicts into
+    parallel per-field columns.
+
+    The parts of the report that never change for a package/version (sorted
+    severities, summary text, indices of the LLM_TOP_VULNS most severe rows)
+    are computed here once instead of on every request.
+    """
+    package = rec.get("package")
+    version = rec.get("installed_version")
+    vulns = rec.get("vulnerabilities") or []
+    severities = [v.get("severity") for v in vulns]
+    severity_codes = [SEVERITY_CODES.get((sev or "").upper(), -1) for sev in severities]
+    severities_found = sorted({sev for sev in severities if sev})
+    status = "VULNERABLE" if vulns else "CLEAN"
+    return {
+        "package": package,
+        "installed_version": version,
+        # Same ordering as _top_k_by_severity: highest code first, ties by position
+        "top_idx": heapq.nlargest(LLM_TOP_VULNS, range(len(severity_codes)), key=severity_codes.__getitem__),
+        "severities_found": severities_found,
+        "report_summary_text": (
+            f"The package {package} version {version} is {status}. "
+            f"{len(vulns)} unique vulnerabilities found. "
+            f"Severities: {', '.join(severities_found) if severities_found else 'N/A'}."
+        ),
+        "columns": {
+            "cve_id": [v.get("cve_id") for v in vulns],
+            "severity": severities,
+            "cvss": [v.get("cvss") for v in vulns],
+            "description": [v.get("description") for v in vulns],
+            "exploits": [v.get("exploits") or [] for v in vulns],
+            "fixes": [v.get("fixes") or [] for v in vulns],
+        },
+    }
+
+
+def _newline_aligned_ranges(path: Path, chunk_bytes: int) -> List[Tuple[int, int]]:
+    """Split a file into [start, end) byte ranges that each end just after a newline."""
+    size = path.stat().st_size
+    if size == 0:
+        return []
+    ranges: List[Tuple[int, int]] = []
+    with path.open("rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        start = 0
+        while start < size:
+            end = start + chunk_bytes
+            if end >= size:
+                end = size
+            else:
+                newline = mm.find(b"\n", end)
+                end = size if newline < 0 else newline + 1
+            ranges.append((start, end))
+            start = end
+    return ranges
+
+
+def _index_byte_range(path: str, start: int, end: int) -> List[Tuple[str, bytes]]:
+    """Parse the dataset lines in [start, end) into (key, columnar record) index rows."""
+    with open(path, "rb") as f:
+        f.seek(start)
+        chunk = f.read(end - start)
+
+    rows: List[Tuple[str, bytes]] = []
+    for line in chunk.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            rec = _json_loads(line)
+        except Exception as exc:  # pragma: no cover
+            LOGGER.warning("Skipping invalid JSON line in master dataset: %s", exc)
+            continue
+        pkg = rec.get("package")
+        ver = rec.get("installed_version")
+        if not pkg or not ver:
+            continue
+        rows.append((f"{pkg}@@{ver}", _json_dumps(_record_to_columns(rec))))
+    return rows
+
+
+def _index_executor(workers: int) -> Executor:
+    """
+    Pool for parsing dataset chunks. JSON decoding holds the GIL, so forked
+    processes are used where available; spawn-only platforms (Windows) would
+    re-import this module - and reload the models - in every child, so they
+    get threads instead.
+    """
+    if "fork" in multiprocessing.get_all_start_methods():
+        return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("fork"))
+    return ThreadPoolExecutor(max_workers=workers)
+
+
+class MasterIndex:
+    """
+    On-disk index over MASTER_package_dataset_validated.jsonl:
       key = f"{package}@@{installed_version}"
       value = full record (including vulnerabilities)
+
+    Records live in a sibling SQLite file (<dataset>.idx.sqlite) that is rebuilt
+    whenever the JSONL is newer, so workers only hold the records they fetch.
     """
-    index: Dict[str, Dict[str, Any]] = {}
-    if not path.exists():
-        LOGGER.warning("Master dataset %s not found; dataset-based lookups disabled.", path)
-        return index
 
-    try:
-        LOGGER.info("Loading master dataset from %s", path)
-        with path.open("r", encoding="utf-8") as f:
-            for line in f:
-                line = line.strip()
-                if not line:
-                    continue
-                try:
-                    rec = json.loads(line)
-                except Exception as exc:  # pragma: no cover
-                    LOGGER.warning("Skipping invalid JSON line in master dataset: %s", exc)
-                    continue
-                pkg = rec.get("package")
-                ver = rec.get("installed_version")
-                if not pkg or not ver:
-                    continue
-                key = f"{pkg}@@{ver}"
-                index[key] = rec
-        LOGGER.info("Loaded %d package records from master dataset.", len(index))
-    except Exception as exc:  # pragma: no cover
-        LOGGER.error("Failed to load master dataset: %s", exc)
-    return index
+    # Byte span parsed per task while building the index
+    CHUNK_BYTES = 32 * 1024 * 1024
+    WORKERS = int(os.getenv("MASTER_INDEX_WORKERS", str(min(8, os.cpu_count() or 1))))
+    # Bump when the stored record layout changes so stale indexes get rebuilt
+    SCHEMA_VERSION = 3
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.index_path = path.with_name(path.name + ".idx.sqlite")
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self._open()
+
+    def _open(self) -> None:
+        if not self.path.exists():
+            LOGGER.warning("Master dataset %s not found; dataset-based lookups disabled.", self.path)
+            return
+
+        try:
+            if (
+                not self.index_path.exists()
+                or self.index_path.stat().st_mtime < self.path.stat().st_mtime
+                or not self._schema_is_current()
+            ):
+                self._build()
+            self._conn = sqlite3.connect(str(self.index_path), check_same_thread=False)
+            self._pid = os.getpid()
+            LOGGER.info("Using master dataset index %s (%d records)", self.index_path, len(self))
+        except Exception as exc:  # pragma: no cover
+            LOGGER.error("Failed to load master dataset: %s", exc)
+            self._conn = None
 
+    def _schema_is_current(self) -> bool:
+        conn = sqlite3.connect(str(self.index_path))
+        try:
+            return conn.execute("PRAGMA user_version").fetchone()[0] == self.SCHEMA_VERSION
+        finally:
+            conn.close()
 
-MASTER_INDEX = _load_master_dataset(MASTER_DATASET_PATH)
+    def _build(self) -> None:
+        LOGGER.info("Indexing master dataset %s -> %s", self.path, self.index_path)
+        tmp_path = self.index_path.with_name(self.index_path.name + ".tmp")
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+        conn = sqlite3.connect(str(tmp_path))
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")
+            conn.execute(f"PRAGMA user_version={self.SCHEMA_VERSION}")
+            conn.execute("CREATE TABLE idx (key TEXT PRIMARY KEY, record BLOB NOT NULL)")
+            insert = "INSERT OR REPLACE INTO idx (key, record) VALUES (?, ?)"
+
+            count = 0
+            ranges = _newline_aligned_ranges(self.path, self.CHUNK_BYTES)
+            workers = max(1, min(self.WORKERS, len(ranges)))
+            if workers == 1:
+                for start, end in ranges:
+                    rows = _index_byte_range(str(self.path), start, end)
+                    conn.executemany(insert, rows)
+                    count += len(rows)
+            else:
+                with _index_executor(workers) as pool:
+                    # Bounded window keeps memory flat; results are consumed in file
+                    # order so later duplicate keys still win, as in a serial scan
+                    pending: deque = deque()
+                    for start, end in ranges:
+                        pending.append(pool.submit(_index_byte_range, str(self.path), start, end))
+                        if len(pending) >= workers * 2:
+                            rows = pending.popleft().result()
+                            conn.executemany(insert, rows)
+                            count += len(rows)
+                    while pending:
+                        rows = pending.popleft().result()
+                        conn.executemany(insert, rows)
+                        count += len(rows)
+            conn.commit()
+            # Fold the WAL back in so the index is a single self-contained file
+            conn.execute("PRAGMA journal_mode=DELETE")
+        finally:
+            conn.close()
+
+        os.replace(tmp_path, self.index_path)
+        LOGGER.info("Indexed %d package records from master dataset.", count)
+
+    def _connection(self) -> sqlite3.Connection:
+        # SQLite handles must not cross fork(); preloaded gunicorn workers reopen their own
+        if self._pid != os.getpid():
+            self._conn = sqlite3.connect(str(self.index_path), check_same_thread=False)
+            self._pid = os.getpid()
+        return self._conn
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        if self._conn is None:
+            return None
+        with self._lock:
+            row = self._connection().execute("SELECT record FROM idx WHERE key = ?", (key,)).fetchone()
+        return _json_loads(row[0]) if row else None
+
+    def __contains__(self, key: object) -> bool:
+        if self._conn is None or not isinstance(key, str):
+            return False
+        with self._lock:
+            return self._connection().execute("SELECT 1 FROM idx WHERE key = ?", (key,)).fetchone() is not None
+
+    def __getitem__(self, key: str) -> Dict[str, Any]:
+        record = self.get(key)
+        if record is None:
+            raise KeyError(key)
+        return record
+
+    def __len__(self) -> int:
+        if self._conn is None:
+            return 0
+        with self._lock:
+            return self._connection().execute("SELECT COUNT(*) FROM idx").fetchone()[0]
 
 
 # ---------------------------------------------------------------------------
 # Local LLM (Mistral) loader
 # ---------------------------------------------------------------------------
 
+# Fixed instruction every /analyze prompt starts with; LocalLLM prefills it once
+# and reuses the KV cache so each call only runs prefill over the JSON payload.
+PROMPT_PREFIX = (
+    "You are a senior application security engineer.\n\n"
+    "Using ONLY the information in the JSON below, write a clear, high‑signal explanation of the risk in 4–5 sentences.\n"
+    "Do NOT just restate the vulnerability description; instead:\n"
+    "1) Explain what could actually go wrong in a real application (impact and rough exploit scenario).\n"
+    "2) Call out why this matters (e.g., data exposure, RCE, DoS, privilege escalation).\n"
+    "3) Suggest 2–3 concrete mitigation steps (patching, configuration changes, compensating controls).\n"
+    "Avoid low‑value phrases like 'this is a vulnerability' or 'it is recommended to'. Be specific and practical.\n\n"
+    "JSON:\n"
+)
+
+
+def _attention_implementation() -> str:
+    """FlashAttention-2 when flash-attn is installed and a GPU is present, else PyTorch SDPA."""
+    if (
+        torch is not None
+        and torch.cuda.is_available()
+        and importlib.util.find_spec("flash_attn") is not None
+    ):
+        return "flash_attention_2"
+    return "sdpa"
+
 
 class LocalLLM:
     def __init__(self) -> None:
@@ -295,11 +814,23 @@ class LocalLLM:
             os.getenv("MISTRAL_DISABLE") or os.getenv("QWEN_DISABLE", "false")
         ).lower() in {"1", "true", "yes"}
         self._pipeline = None
+        # Plain flag for the per-request check; True once the pipeline is built
+        self.loaded = False
+        self._prefix_cache = None
+        # /analyze runs in worker threads; the pipeline must not be driven concurrently
+        self._lock = threading.Lock()
+        # Loaded by load() at app startup, so a preloading parent never touches the GPU
+        self._load_attempted = False
+        if not self.enabled:
+            LOGGER.warning("Local LLM disabled via environment variable.")
 
-        if self.enabled:
+    def load(self) -> None:
+        """Load the model once; later calls are no-ops."""
+        with self._lock:
+            if self._load_attempted or not self.enabled:
+                return
+            self._load_attempted = True
             self._load()
-        else:
-            LOGGER.warning("Local LLM disabled via environment variable.")
 
     @property
     def info(self) -> Dict[str, Any]:
@@ -308,7 +839,7 @@ class LocalLLM:
             "quantization": self.quantization if self.enabled else "disabled",
             "max_new_tokens": self.max_new_tokens,
             "temperature": self.temperature,
-            "loaded": self._pipeline is not None,
+            "loaded": self.loaded,
         }
 
     def _load(self) -> None:
@@ -332,18 +863,34 @@ class LocalLLM:
             return
 
         try:
-            LOGGER.info("Loading Mistral LLM from %s (4bit, device_map=auto)", model_path)
-
-            quantization_config = BitsAndBytesConfig(load_in_4bit=True) if BitsAndBytesConfig else None
-
             tokenizer = AutoTokenizer.from_pretrained(model_path, trust_remote_code=True)
 
-            model = AutoModelForCausalLM.from_pretrained(
-                model_path,
-                quantization_config=quantization_config,
-                device_map="auto",
-                dtype=torch.float16 if torch is not None else None,
-            )
+            if self.quantization == "awq" and AutoAWQForCausalLM is not None:
+                # Prequantized INT4 checkpoint (see HF_Download.py / MISTRAL_HF_MODEL_ID)
+                LOGGER.info("Loading Mistral LLM from %s (awq, fused layers)", model_path)
+                model = AutoAWQForCausalLM.from_quantized(str(model_path), fuse_layers=True).model
+            else:
+                if self.quantization == "awq":
+                    LOGGER.warning("autoawq not installed; loading %s with bitsandbytes 4bit.", model_path)
+                LOGGER.info("Loading Mistral LLM from %s (4bit, device_map=auto)", model_path)
+                quantization_config = BitsAndBytesConfig(load_in_4bit=True) if BitsAndBytesConfig else None
+                model = AutoModelForCausalLM.from_pretrained(
+                    model_path,
+                    quantization_config=quantization_config,
+                    device_map="auto",
+                    dtype=torch.float16 if torch is not None else None,
+                    attn_implementation=_attention_implementation(),
+                )
+            model.eval()
+            model.generation_config.use_cache = True
+
+            # Opt-in: graph compilation pays a long warm-up on the first few prompts
+            if (
+                os.getenv("MISTRAL_TORCH_COMPILE", "").lower() in {"1", "true", "yes"}
+                and hasattr(torch, "compile")
+            ):
+                LOGGER.info("Compiling Mistral with torch.compile (mode=reduce-overhead)")
+                model = torch.compile(model, mode="reduce-overhead", fullgraph=False)
 
             if tokenizer.pad_token is None:
                 tokenizer.pad_token = tokenizer.eos_token
@@ -357,6 +904,10 @@ class LocalLLM:
                 repetition_penalty=1.1,
                 pad_token_id=tokenizer.eos_token_id,
             )
+            self._model = model
+            self._tokenizer = tokenizer
+            self._cache_prompt_prefix()
+            self.loaded = True
         except Exception as exc:  # pragma: no cover
             LOGGER.error("Failed to load local LLM: %s", exc)
             # Disable LLM but keep the service running with structured summaries.
@@ -364,14 +915,95 @@ class LocalLLM:
             self._pipeline = None
             return
 
+    def _cache_prompt_prefix(self) -> None:
+        """Prefill PROMPT_PREFIX once and keep its KV cache for every later call."""
+        try:
+            prefix_ids = self._tokenizer(PROMPT_PREFIX, return_tensors="pt").input_ids.to(self._model.device)
+            with torch.inference_mode():
+                out = self._model(prefix_ids, use_cache=True)
+            self._prefix_ids = prefix_ids
+            self._prefix_cache = out.past_key_values
+            LOGGER.info("Cached KV state for %d prompt-prefix tokens", prefix_ids.shape[-1])
+        except Exception as exc:  # pragma: no cover - model/transformers dependent
+            LOGGER.warning("Prompt-prefix KV cache unavailable; using full prefill: %s", exc)
+            self._prefix_cache = None
+
+    def _generate_kwargs(self, prompt: str) -> Dict[str, Any]:
+        """model.generate() arguments for prompt, replaying the prefix KV cache when it applies."""
+        input_ids = self._tokenizer(prompt, return_tensors="pt").input_ids.to(self._model.device)
+        kwargs: Dict[str, Any] = {
+            "input_ids": input_ids,
+            "attention_mask": torch.ones_like(input_ids),
+            "max_new_tokens": self.max_new_tokens,
+            "do_sample": self.temperature > 0,
+            "temperature": self.temperature,
+            "repetition_penalty": 1.1,
+            "pad_token_id": self._tokenizer.eos_token_id,
+        }
+        if self._prefix_cache is not None and prompt.startswith(PROMPT_PREFIX):
+            prefix_len = self._prefix_ids.shape[-1]
+            # The cache is only valid if the prompt tokenizes to the same prefix tokens
+            if input_ids.shape[-1] > prefix_len and torch.equal(input_ids[:, :prefix_len], self._prefix_ids):
+                # generate() extends the cache in place, so hand it a copy
+                kwargs["past_key_values"] = copy.deepcopy(self._prefix_cache)
+        return kwargs
+
+    def _generate_with_prefix(self, prompt: str) -> Optional[str]:
+        """Generate reusing the cached prefix KV; None when the prompt can't use it."""
+        if self._prefix_cache is None:
+            return None
+        kwargs = self._generate_kwargs(prompt)
+        if "past_key_values" not in kwargs:
+            return None
+
+        output_ids = self._model.generate(**kwargs)
+        prompt_len = kwargs["input_ids"].shape[-1]
+        return self._tokenizer.decode(output_ids[0, prompt_len:], skip_special_tokens=True).strip()
+
+    def invoke_stream(self, prompt: str) -> Iterator[str]:
+        """Yield generated text pieces as the model emits them (nothing if the LLM is unavailable)."""
+        if not self.enabled or not self._pipeline or TextIteratorStreamer is None:
+            return
+
+        with self._lock:
+            kwargs = self._generate_kwargs(prompt)
+            streamer = TextIteratorStreamer(self._tokenizer, skip_prompt=True, skip_special_tokens=True)
+
+            def _generate() -> None:
+                try:
+                    with torch.inference_mode():
+                        self._model.generate(**kwargs, streamer=streamer)
+                except Exception as exc:  # pragma: no cover - model/transformers dependent
+                    LOGGER.error("Streaming LLM invocation failed: %s", exc)
+                    # Unblock the consumer waiting on the streamer queue
+                    streamer.end()
+
+            worker = threading.Thread(target=_generate, daemon=True)
+            worker.start()
+            try:
+                for piece in streamer:
+                    if piece:
+                        yield piece
+            finally:
+                # Hold the lock until generation is done, even if the client went away
+                worker.join()
+
     def invoke(self, prompt: str) -> str:
         if not self.enabled or not self._pipeline:
             return "LLM unavailable"
 
         try:
-            output = self._pipeline(
-                prompt, do_sample=self.temperature > 0
-            )[0]["generated_text"]
+            with self._lock, (torch.inference_mode() if torch is not None else contextlib.nullcontext()):
+                try:
+                    completion = self._generate_with_prefix(prompt)
+                except Exception as exc:  # pragma: no cover - model/transformers dependent
+                    LOGGER.warning("Prefix-cached generation failed; using the pipeline: %s", exc)
+                    completion = None
+                if completion is not None:
+                    return completion
+                output = self._pipeline(
+                    prompt, do_sample=self.temperature > 0
+                )[0]["generated_text"]
             # Only keep the content after the prompt (if pipeline echoes prompt)
             return (
                 output.split(prompt, 1)[-1].strip()
@@ -384,10 +1016,27 @@ class LocalLLM:
 
 
 # Global instances
-VECTOR_SERVICE = VectorStoreService()
+MASTER_INDEX: MasterIndex
+VECTOR_SERVICE: VectorStoreService
 LLM = LocalLLM()
 
 
+def preload() -> None:
+    """
+    Load the read-only shared state (master dataset index, vector store).
+
+    Runs at import, so `gunicorn --preload` (see gunicorn.conf.py) loads it once
+    in the master and forks it copy-on-write into every worker. The LLM is not
+    part of it: it is loaded per worker at startup, in a single worker only.
+    """
+    global MASTER_INDEX, VECTOR_SERVICE
+    MASTER_INDEX = MasterIndex(MASTER_DATASET_PATH)
+    VECTOR_SERVICE = VectorStoreService()
+
+
+preload()
+
+
 # ---------------------------------------------------------------------------
 # Helpers to build structured reports
 # ---------------------------------------------------------------------------
@@ -404,15 +1053,12 @@ def _format_docs(docs: List[Any]) -> List[Dict[str, Any]]:
             continue
 
         seen_cves.add(cve_id)
-        try:
-            exploits = json.loads(metadata.get("exploits_json", "[]"))
-        except Exception:
-            exploits = []
-
-        try:
-            fixes = json.loads(metadata.get("fixes_json", "[]"))
-        except Exception:
-            fixes = []
+        links = VECTOR_SERVICE.cve_links.get(cve_id)
+        if links:
+            exploits, fixes = links
+        else:
+            exploits = _parse_json_list(metadata.get("exploits_json"))
+            fixes = _parse_json_list(metadata.get("fixes_json"))
 
         context_list.append(
             {
@@ -473,63 +1119,104 @@ def _build_report(package: str, version: str, docs: List[Any]) -> Dict[str, Any]
 
 def _build_report_from_dataset(record: Dict[str, Any]) -> Dict[str, Any]:
     """
-    Build a structured report directly from a master dataset record.
+    Build a structured report directly from a master dataset record
+    (columnar layout, see _record_to_columns).
     This bypasses the vector DB when we have an exact package/version match.
     """
     package = record.get("package")
     version = record.get("installed_version")
-    vulns = record.get("vulnerabilities") or []
+    columns = record.get("columns") or {}
+    cve_ids = columns.get("cve_id") or []
 
-    if vulns:
+    if cve_ids:
         status = "VULNERABLE"
-        context_list: List[Dict[str, Any]] = []
-        for v in vulns:
-            context_list.append(
-                {
-                    "cve_id": v.get("cve_id"),
-                    "severity": v.get("severity"),
-                    "cvss": v.get("cvss"),
-                    "description": v.get("description"),
-                    "exploits": v.get("exploits") or [],
-                    "fixes": v.get("fixes") or [],
-                }
-            )
-        vuln_count = len(context_list)
-        severities = sorted(
+        context_list: List[Dict[str, Any]] = [
             {
-                item.get("severity", "UNKNOWN")
-                for item in context_list
-                if item.get("severity")
+                "cve_id": cve_id,
+                "severity": severity,
+                "cvss": cvss,
+                "description": description,
+                "exploits": exploits,
+                "fixes": fixes,
             }
-        )
+            for cve_id, severity, cvss, description, exploits, fixes in zip(
+                cve_ids,
+                columns["severity"],
+                columns["cvss"],
+                columns["description"],
+                columns["exploits"],
+                columns["fixes"],
+            )
+        ]
     else:
         status = "CLEAN"
         context_list = []
-        vuln_count = 0
-        severities = []
 
     return {
         "package": package,
         "version": version,
         "status": status,
         "retrieved_docs_count": len(context_list),
-        "unique_vuln_count": vuln_count,
-        "severities_found": severities,
+        "unique_vuln_count": len(context_list),
+        "severities_found": list(record["severities_found"]),
         "all_vulnerabilities": context_list,
-        "report_summary_text": (
-            f"The package {package} version {version} is {status}. "
-            f"{vuln_count} unique vulnerabilities found. "
-            f"Severities: {', '.join(severities) if severities else 'N/A'}."
-        ),
+        "report_summary_text": record["report_summary_text"],
     }
 
 
+def _top_k_by_severity_py(severity_codes: Any, k: int) -> List[int]:
+    # nlargest == sorted(..., reverse=True)[:k], so ties keep their original order
+    return heapq.nlargest(k, range(len(severity_codes)), key=severity_codes.__getitem__)
+
+
+if njit is not None and np is not None:
+
+    # cache=True persists the machine code in __pycache__, so restarts skip compilation
+    @njit(cache=True, fastmath=True)
+    def _top_k_by_severity_jit(severity_codes, k):  # pragma: no cover - compiled
+        n = severity_codes.shape[0]
+        k = min(k, n)
+        out = np.empty(k, dtype=np.int32)
+        taken = np.zeros(n, dtype=np.bool_)
+        for slot in range(k):
+            best = -1
+            for i in range(n):
+                # strict '>' keeps the earliest index on ties (stable, like sorted)
+                if not taken[i] and (best < 0 or severity_codes[i] > severity_codes[best]):
+                    best = i
+            taken[best] = True
+            out[slot] = best
+        return out
+
+    def _top_k_by_severity(severity_codes: List[int], k: int) -> List[int]:
+        return _top_k_by_severity_jit(np.asarray(severity_codes, dtype=np.int8), k).tolist()
+
+    # Compile (or load from cache) now, with the request-time signature, instead
+    # of stalling the first vulnerable /analyze call
+    try:
+        _top_k_by_severity_jit(np.zeros(1, dtype=np.int8), LLM_TOP_VULNS)
+    except Exception as exc:  # pragma: no cover - numba/numpy mismatch
+        LOGGER.warning("Numba severity ranking unavailable; using heapq: %s", exc)
+        _top_k_by_severity = _top_k_by_severity_py
+
+else:
+    _top_k_by_severity = _top_k_by_severity_py
+
+
+def _severity_code(vuln: Dict[str, Any]) -> int:
+    return SEVERITY_CODES.get((vuln.get("severity") or "").upper(), -1)
+
+
 # ---------------------------------------------------------------------------
 # FastAPI app
 # ---------------------------------------------------------------------------
 
 
-app = FastAPI(title="ArmourEye Simple RAG Service", version="1.0.0")
+app = FastAPI(
+    title="ArmourEye Simple RAG Service",
+    version="1.0.0",
+    default_response_class=ORJSONResponse if orjson else JSONResponse,
+)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=os.getenv("AI_CORS_ALLOW_ORIGINS", "*").split(","),
@@ -540,11 +1227,69 @@ app.add_middleware(
 
 
 class PackageQuery(BaseModel):
-    package_name: str
-    version: str
+    # Reject unknown fields and oversize values before any dataset/vector work
+    model_config = ConfigDict(extra="forbid", frozen=True)
+
+    # 214 is the npm package-name limit, the longest of the ecosystems scanned
+    package_name: str = Field(..., min_length=1, max_length=214)
+    version: str = Field(..., min_length=1, max_length=64)
     summarize_with_llm: bool = True
 
 
+class _TTLCache:
+    """Small thread-safe LRU map whose entries expire after `ttl` seconds."""
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Any, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Any) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def put(self, key: Any, value: Any) -> None:
+        if self.maxsize <= 0 or self.ttl <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+
+# Responses are deterministic for a given dataset/store/model, and both are fixed
+# for the life of the process, so entries only need to expire for memory's sake.
+RESPONSE_CACHE = _TTLCache(
+    maxsize=int(os.getenv("AI_RESPONSE_CACHE_SIZE", "4096")),
+    ttl=float(os.getenv("AI_RESPONSE_CACHE_TTL", "3600")),
+)
+
+LLM_FAILURE_SUMMARY = "LLM was unable to generate a summary for this vulnerability."
+
+
+def _cache_response(cache_key: Tuple[str, str, bool], result: Dict[str, Any]) -> None:
+    # A failed generation (transient GPU/OOM error) is retried on the next request, not cached
+    if result.get("llm_summary") != LLM_FAILURE_SUMMARY:
+        RESPONSE_CACHE.put(cache_key, result)
+
+
+@app.on_event("startup")
+def _load_llm() -> None:
+    # gunicorn.conf.py sets AI_LLM_WORKER=0 in every worker but the one that owns the GPU
+    if os.getenv("AI_LLM_WORKER", "1") != "0":
+        LLM.load()
+
+
 @app.get("/health")
 async def health() -> Dict[str, Any]:
     ready = VECTOR_SERVICE.is_ready
@@ -568,16 +1313,88 @@ async def analyze(query: PackageQuery) -> Dict[str, Any]:
     If summarize_with_llm is false or the LLM is disabled, llm_summary is
     derived from the structured data only.
     """
+    cache_key = (query.package_name, query.version, query.summarize_with_llm)
+    cached = RESPONSE_CACHE.get(cache_key)
+    if cached is not None:
+        return cached
+
+    # Index lookups, embedding and generation all block; keep them off the event loop
+    result = await anyio.to_thread.run_sync(_analyze_sync, query)
+    _cache_response(cache_key, result)
+    return result
+
+
+@app.post("/analyze/stream")
+async def analyze_stream(query: PackageQuery) -> StreamingResponse:
+    """
+    Same analysis as /analyze, streamed as NDJSON.
+
+    Emits one {"token": str} line per generated text piece while the LLM runs,
+    then a final {"report": {...}} line holding the /analyze response body.
+    Cached or LLM-free results produce only the final line.
+    """
+    cache_key = (query.package_name, query.version, query.summarize_with_llm)
+    cached = RESPONSE_CACHE.get(cache_key)
+    if cached is not None:
+        return StreamingResponse(iter([_ndjson_line({"report": cached})]), media_type="application/x-ndjson")
+
+    report, prompt, llm_summary = await anyio.to_thread.run_sync(_prepare_analysis, query)
+
+    # Sync generator: Starlette iterates it in the threadpool, so generate() never blocks the loop
+    def _lines() -> Iterator[bytes]:
+        summary = llm_summary
+        if prompt is not None:
+            pieces: List[str] = []
+            for piece in LLM.invoke_stream(prompt):
+                pieces.append(piece)
+                yield _ndjson_line({"token": piece})
+            summary = _summary_from_llm("".join(pieces).strip())
+        result = {"structured_report": report, "llm_summary": summary}
+        _cache_response(cache_key, result)
+        yield _ndjson_line({"report": result})
+
+    return StreamingResponse(_lines(), media_type="application/x-ndjson")
+
+
+def _ndjson_line(obj: Dict[str, Any]) -> bytes:
+    return _json_dumps(obj) + b"\n"
+
+
+def _analyze_sync(query: PackageQuery) -> Dict[str, Any]:
+    report, prompt, llm_summary = _prepare_analysis(query)
+    if prompt is not None:
+        llm_summary = _summary_from_llm(LLM.invoke(prompt))
+    return {
+        "structured_report": report,
+        "llm_summary": llm_summary,
+    }
+
+
+def _summary_from_llm(llm_out: str) -> str:
+    if llm_out and llm_out not in {"LLM unavailable", "LLM invocation failed"}:
+        return llm_out
+    return LLM_FAILURE_SUMMARY
+
+
+def _prepare_analysis(query: PackageQuery) -> Tuple[Dict[str, Any], Optional[str], str]:
+    """
+    Build the structured report for a query.
+
+    Returns (report, prompt, llm_summary). When prompt is not None the LLM still
+    has to run on it to produce the summary; otherwise llm_summary is final.
+    """
     # 1) Prefer exact lookup in the master dataset (authoritative ground truth)
     key = f"{query.package_name}@@{query.version}"
-    if key in MASTER_INDEX:
+    record = MASTER_INDEX.get(key)
+    top_idx: Optional[List[int]] = None
+    if record is not None:
         LOGGER.info(
             "Analyzing package %s %s via master dataset (exact match)",
             query.package_name,
             query.version,
         )
-        record = MASTER_INDEX[key]
         report = _build_report_from_dataset(record)
+        top_idx = record["top_idx"]
     else:
         # 2) If not in master dataset, fall back to vector search (if available)
         if not VECTOR_SERVICE.is_ready:
@@ -598,93 +1415,74 @@ async def analyze(query: PackageQuery) -> Dict[str, Any]:
 
     # Prepare data for LLM summarization. We want the LLM to always produce the
     # main explanation for vulnerable packages (per your request), not a local
-    # fallback string.
+    # fallback string. Every other report gets a fixed template and never touches LLM.
     vulns = report.get("all_vulnerabilities") or []
-    llm_summary = ""
-
-    if query.summarize_with_llm and LLM.enabled and LLM.info.get("loaded"):
-        if report.get("status") == "VULNERABLE" and vulns:
-            severity_order = {"CRITICAL": 3, "HIGH": 2, "MEDIUM": 1, "LOW": 0}
-            sorted_vulns = sorted(
-                vulns,
-                key=lambda v: severity_order.get((v.get("severity") or "").upper(), -1),
-                reverse=True,
-            )
-            top_vulns = [
-                {
-                    "cve_id": v.get("cve_id"),
-                    "severity": v.get("severity"),
-                    "description": v.get("description"),
-                }
-                for v in sorted_vulns[:3]
-            ]
+    status = (report.get("status") or "UNKNOWN").upper()
+    llm_ready = query.summarize_with_llm and LLM.loaded
+    if not (llm_ready and status == "VULNERABLE" and vulns):
+        return report, None, _status_summary(report, status, llm_ready)
+
+    # Only the most severe are shown to the LLM; dataset records carry them
+    # precomputed, and a short list needs no ranking at all
+    if top_idx is None:
+        if len(vulns) <= LLM_TOP_VULNS:
+            top_idx = list(range(len(vulns)))
+        else:
+            top_idx = _top_k_by_severity([_severity_code(v) for v in vulns], LLM_TOP_VULNS)
+    top_vulns = [
+        {
+            "cve_id": vulns[i].get("cve_id"),
+            "severity": vulns[i].get("severity"),
+            "description": vulns[i].get("description"),
+        }
+        for i in top_idx
+    ]
+
+    compact_payload = {
+        "package": report.get("package"),
+        "version": report.get("version"),
+        "status": report.get("status"),
+        "unique_vuln_count": report.get("unique_vuln_count"),
+        "severities_found": report.get("severities_found"),
+        "top_vulnerabilities": top_vulns,
+    }
 
-            compact_payload = {
-                "package": report.get("package"),
-                "version": report.get("version"),
-                "status": report.get("status"),
-                "unique_vuln_count": report.get("unique_vuln_count"),
-                "severities_found": report.get("severities_found"),
-                "top_vulnerabilities": top_vulns,
-            }
+    prompt = (
+        PROMPT_PREFIX
+        + _json_dumps(compact_payload).decode("utf-8")
+        + "\n\n"
+        "Security analysis:\n"
+    )
+    return report, prompt, ""
 
-            prompt = (
-                "You are a senior application security engineer.\n\n"
-                "Using ONLY the information in the JSON below, write a clear, high‑signal explanation of the risk in 4–5 sentences.\n"
-                "Do NOT just restate the vulnerability description; instead:\n"
-                "1) Explain what could actually go wrong in a real application (impact and rough exploit scenario).\n"
-                "2) Call out why this matters (e.g., data exposure, RCE, DoS, privilege escalation).\n"
-                "3) Suggest 2–3 concrete mitigation steps (patching, configuration changes, compensating controls).\n"
-                "Avoid low‑value phrases like 'this is a vulnerability' or 'it is recommended to'. Be specific and practical.\n\n"
-                "JSON:\n"
-                f"{json.dumps(compact_payload, separators=(',', ':'), ensure_ascii=False)}\n\n"
-                "Security analysis:\n"
-            )
-            llm_out = LLM.invoke(prompt)
-            if llm_out and llm_out not in {"LLM unavailable", "LLM invocation failed"}:
-                llm_summary = llm_out
-            else:
-                llm_summary = "LLM was unable to generate a summary for this vulnerability."
-        else:
-            # Non-vulnerable or no vulns: brief status message
-            status = (report.get("status") or "UNKNOWN").upper()
-            pkg = report.get("package") or "This package"
-            ver = report.get("version") or ""
-            version_part = f" {ver}" if ver else ""
-            if status == "CLEAN":
-                llm_summary = (
-                    f"{pkg}{version_part} currently has no known vulnerabilities in the dataset "
-                    "and is considered low risk, assuming it is kept up to date."
-                )
-            else:
-                llm_summary = (
-                    f"The risk status of {pkg}{version_part} is unknown. No matching vulnerabilities "
-                    "were found in the dataset, so additional manual analysis may be required."
-                )
-    else:
-        # If LLM is disabled/unavailable, provide a minimal summary to avoid empty UI.
-        status = (report.get("status") or "UNKNOWN").upper()
-        pkg = report.get("package") or "This package"
-        ver = report.get("version") or ""
-        version_part = f" {ver}" if ver else ""
-        if status == "VULNERABLE":
-            llm_summary = (
-                f"{pkg}{version_part} has vulnerabilities in the dataset. "
-                "See the detailed findings below for impact and remediation steps."
-            )
-        elif status == "CLEAN":
-            llm_summary = (
-                f"{pkg}{version_part} has no known vulnerabilities in the dataset."
-            )
-        else:
-            llm_summary = (
-                f"The risk status of {pkg}{version_part} is unknown based on the current dataset."
+
+def _status_summary(report: Dict[str, Any], status: str, llm_ready: bool) -> str:
+    """Fixed summary for reports that don't go through the LLM."""
+    pkg = report.get("package") or "This package"
+    ver = report.get("version") or ""
+    version_part = f" {ver}" if ver else ""
+
+    if llm_ready:
+        # Non-vulnerable or no vulns: brief status message
+        if status == "CLEAN":
+            return (
+                f"{pkg}{version_part} currently has no known vulnerabilities in the dataset "
+                "and is considered low risk, assuming it is kept up to date."
             )
+        return (
+            f"The risk status of {pkg}{version_part} is unknown. No matching vulnerabilities "
+            "were found in the dataset, so additional manual analysis may be required."
+        )
 
-    return {
-        "structured_report": report,
-        "llm_summary": llm_summary,
-    }
+    # If LLM is disabled/unavailable, provide a minimal summary to avoid empty UI.
+    if status == "VULNERABLE":
+        return (
+            f"{pkg}{version_part} has vulnerabilities in the dataset. "
+            "See the detailed findings below for impact and remediation steps."
+        )
+    if status == "CLEAN":
+        return f"{pkg}{version_part} has no known vulnerabilities in the dataset."
+    return f"The risk status of {pkg}{version_part} is unknown based on the current dataset."
 
 
 if __name__ == "__main__":  # pragma: no cover
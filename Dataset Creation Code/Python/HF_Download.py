@@ -1,5 +1,13 @@
-from huggingface_hub import snapshot_download, login
 import os
+import importlib.util
+
+# Faster parallel downloads via hf_transfer when installed (same setup as download_llama.py);
+# these have to be set before huggingface_hub is imported
+if importlib.util.find_spec("hf_transfer"):
+    os.environ.setdefault("HF_HUB_ENABLE_HF_TRANSFER", "1")
+os.environ.setdefault("HF_HUB_DOWNLOAD_TIMEOUT", "60")
+
+from huggingface_hub import snapshot_download, login
 
 # 1️⃣ Paste your Hugging Face token here
 # Get your token from: https://huggingface.co/settings/tokens
@@ -13,12 +21,15 @@ save_dir = r"C:\Users\Demo_\Downloads\TESTING\mistral"
 os.makedirs(save_dir, exist_ok=True)
 
 # 4️⃣ Download the model without extra cache
-model_name = "mistralai/Mistral-7B-Instruct-v0.3"
+# Set MISTRAL_HF_MODEL_ID to a prequantized AWQ build of Mistral-7B-Instruct-v0.3
+# to use with MISTRAL_QUANTIZATION=awq in simple_rag_server.py
+model_name = os.getenv("MISTRAL_HF_MODEL_ID", "mistralai/Mistral-7B-Instruct-v0.3")
 snapshot_download(
     repo_id=model_name,
     local_dir=save_dir,
     local_dir_use_symlinks=False,  # makes real copies, avoids cache symlinks
-    token=hf_token
+    token=hf_token,
+    max_workers=8  # download several shards at once
 )
 
 print(f"✅ Model downloaded clean to: {save_dir}")
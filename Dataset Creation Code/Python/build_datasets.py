@@ -0,0 +1,173 @@
+import os
+import glob
+import logging
+from concurrent.futures import ProcessPoolExecutor
+import orjson
+from tqdm import tqdm
+
+# The three extractors below normally run as separate scripts, each reading and
+# parsing every Trivy scan on its own; this runs them off a single parse per scan
+from fingerprint_cve_extract_webapp import (
+    FINGERPRINT_DIR, OUTPUT_DIR, extract_vulnerabilities, make_cve_key, write_combined,
+)
+from package_extractor import IN_DIR as PACKAGE_IN_DIR, OUT_DIR as PACKAGE_OUT_DIR, extract_packages
+
+# --- Config ---
+# Same inputs and output as image_checker_for_testing.py (that script does its
+# work at import time, so its settings can't be imported)
+IMAGE_SCAN_DIRS = [
+    r"C:\Users\Demo_\fingerprints",
+    r"C:\Windows\System32"
+]
+IMAGE_OUT_PATH = os.path.join(OUTPUT_DIR, "image_details.json")
+
+logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+
+def iter_image_scans(dirs):
+    """Yield the scan files image_checker_for_testing.py would read from each directory."""
+    for directory in dirs:
+        if not os.path.isdir(directory):
+            logging.warning(f"Scan directory not found, skipping: {directory}")
+            continue
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                # Skip dotfiles, as glob's "*" did
+                if entry.name.endswith(".json") and not entry.name.startswith(".") and entry.is_file():
+                    yield entry.path
+
+
+def image_details(file_name, data):
+    """The image_details.json entry for one scan, or None if it has no ArtifactName (not a real scan)."""
+    artifact_name = data.get("ArtifactName")
+    if not artifact_name:
+        return None
+    os_info = data.get("Metadata", {}).get("OS", {})
+    return {
+        "source_file": file_name,
+        "image_name": artifact_name,
+        "os_family": os_info.get("Family"),
+        "os_name": os_info.get("Name"),
+    }
+
+
+def process_scan(job):
+    """
+    Parse one Trivy scan once and run the extractors it is an input of (runs in a worker process).
+
+    job is (file_path, roles), roles being a subset of {"cves", "image", "packages"}.
+    Returns {role: result} for every extractor that succeeded, so one failing
+    extractor doesn't cost the others their output; None if the scan can't be
+    read or parsed at all. The per-webapp package details file is written
+    here, as package_extractor.py does.
+    """
+    file_path, roles = job
+    file_name = os.path.basename(file_path)
+    try:
+        with open(file_path, 'rb') as f:
+            data = orjson.loads(f.read())
+    except Exception as e:
+        logging.warning(f"  Could not read or parse {file_path}: {e}")
+        return None
+
+    out = {}
+    if "cves" in roles:
+        try:
+            # A null Vulnerabilities list yields nothing, as in the streaming parser
+            vulns = (
+                vuln
+                for result in data.get("Results") or []
+                for vuln in result.get("Vulnerabilities") or []
+            )
+            out["cves"] = extract_vulnerabilities(vulns)
+        except Exception as e:
+            logging.warning(f"  Could not extract fingerprints/CVEs from {file_path}: {e}")
+
+    if "image" in roles:
+        try:
+            out["image"] = image_details(file_name, data)
+        except Exception as e:
+            logging.warning(f"An error occurred with {file_path}: {e}. Skipping.")
+
+    if "packages" in roles:
+        try:
+            webapp_name = file_name.split("_fingerprint")[0]
+            out_file = PACKAGE_OUT_DIR / f"{webapp_name}_package_details.json"
+            out_file.write_bytes(orjson.dumps(extract_packages(data), option=orjson.OPT_INDENT_2))
+            out["packages"] = out_file
+        except Exception as e:
+            logging.warning(f"  Could not write package details for {file_path}: {e}")
+
+    return out
+
+
+def main():
+    # Each extractor keeps the input set of the script it replaces; files that
+    # several of them read are still only parsed once
+    cve_files = glob.glob(os.path.join(FINGERPRINT_DIR, "*.json"))
+    image_files = list(iter_image_scans(IMAGE_SCAN_DIRS))
+    package_files = [str(path) for path in PACKAGE_IN_DIR.glob("*_fingerprint*") if path.is_file()]
+
+    def file_key(path):
+        return os.path.normcase(os.path.abspath(path))
+
+    jobs = {}
+    for role, paths in (("cves", cve_files), ("image", image_files), ("packages", package_files)):
+        for path in paths:
+            jobs.setdefault(file_key(path), (path, set()))[1].add(role)
+    logging.info(
+        f"Found {len(jobs)} scan files ({len(cve_files)} for CVEs, "
+        f"{len(image_files)} for image details, {len(package_files)} for package details)\n"
+    )
+
+    job_list = list(jobs.values())
+    with ProcessPoolExecutor() as executor:
+        outputs = dict(zip(
+            (file_key(path) for path, _ in job_list),
+            tqdm(executor.map(process_scan, job_list), total=len(job_list), desc="Processing scans"),
+        ))
+
+    # Merge in each script's own file order, so "first seen" matches a standalone run
+    fingerprint_pairs = []
+    cve_seen_set = set()
+    all_cves_list = []
+    for path in cve_files:
+        extracted = (outputs[file_key(path)] or {}).get("cves")
+        if extracted is None:
+            continue
+        fingerprints, cves = extracted
+        fingerprint_pairs.extend(fingerprints)
+        for cve in cves:
+            cve_key = make_cve_key(*cve[:3])  # (cve_id, package, version)
+            if cve_key not in cve_seen_set:
+                all_cves_list.append(cve)
+                cve_seen_set.add(cve_key)
+
+    image_details_list = []
+    for path in image_files:
+        out = outputs[file_key(path)] or {}
+        if "image" not in out:
+            continue
+        if out["image"] is None:
+            logging.warning("Skipping %s: No 'ArtifactName' found.", os.path.basename(path))
+        else:
+            image_details_list.append(out["image"])
+
+    package_count = sum(1 for path in package_files if "packages" in (outputs[file_key(path)] or {}))
+
+    # --- Write Final Files ---
+    write_combined(fingerprint_pairs, all_cves_list)
+
+    try:
+        with open(IMAGE_OUT_PATH, 'wb') as f:
+            f.write(orjson.dumps(image_details_list, option=orjson.OPT_INDENT_2))
+        logging.info(f"✅ Successfully wrote {len(image_details_list)} image details to {IMAGE_OUT_PATH}")
+    except Exception as e:
+        logging.error(f"  Failed to write image details file: {e}")
+
+    logging.info(f"✅ Wrote {package_count} package details files to {PACKAGE_OUT_DIR}")
+    logging.info("\nAll files processed.")
+
+
+if __name__ == "__main__":
+    main()
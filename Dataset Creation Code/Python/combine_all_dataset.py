@@ -1,6 +1,10 @@
 import os
-import json
+import re
+import mmap
 import logging
+from multiprocessing import Pool
+
+import orjson
 from tqdm import tqdm
 
 # --- Config ---
@@ -18,67 +22,186 @@ INPUT_FILES = [
 # 2. The new master file
 OUTPUT_FILE = os.path.join(DATASET_DIR, "MASTER_package_dataset.jsonl")
 
+# Inputs are read (and handed to workers) in large binary blocks instead of
+# line-by-line text iteration; progress is also reported once per block
+READ_CHUNK_SIZE = 8 << 20
+
+# Every producer writes "package" and "installed_version" as the first two keys,
+# so the dedup key can be read off the start of the raw line without parsing the
+# whole vulnerabilities array. Lines that don't match (null values, escaped
+# characters, other key orders) fall back to a full parse. The key is captured
+# rather than hashing a raw prefix: the same package/version can be written with
+# different bytes (spacing, field contents), which a prefix hash would miss.
+KEY_PREFIX_RE = re.compile(
+    rb'\{\s*"package"\s*:\s*"([^"\\]*)"\s*,\s*"installed_version"\s*:\s*"([^"\\]*)"'
+)
+
+# Accepted lines are collected in a bytearray and flushed with os.write once this full
+WRITE_BUFFER_SIZE = 8 << 20
+
 logging.basicConfig(level=logging.INFO, format="%(message)s")
 
-# --- Counters ---
-total_cves = 0
-total_packages = 0
-packages_with_exploits = 0
-packages_with_fixes = 0
 
-# Set to track duplicates: (package_name, version)
-seen_packages = set()
+def chunk_ranges(file_path):
+    """Split a file into (file_path, start, end) blocks of ~READ_CHUNK_SIZE that end on a newline."""
+    size = os.path.getsize(file_path)
+    ranges = []
+    with open(file_path, 'rb') as f:
+        start = 0
+        while start < size:
+            f.seek(min(start + READ_CHUNK_SIZE, size))
+            f.readline()  # run on to the end of the line the block boundary falls in
+            end = f.tell()
+            ranges.append((file_path, start, end))
+            start = end
+    return ranges
+
+
+def write_all(fd, data):
+    """os.write until every byte is out (it may write less than asked)."""
+    view = memoryview(data)
+    while view:
+        view = view[os.write(fd, view):]
+
+
+def as_key_part(value):
+    # Same bytes the regex captures, so both paths produce identical keys
+    return value.encode("utf-8") if isinstance(value, str) else value
+
+
+def parse_chunk(task):
+    """
+    Decode one block of an input file (runs in a worker process).
+
+    Returns one (pkg_key, raw_line, vuln_count, has_exploit, has_fix) tuple per
+    package/version, for its first occurrence in this block, in file order.
+    """
+    file_path, start, end = task
+    rows = []
+    seen_in_chunk = set()
+    # Lines are sliced straight out of the mapped file (page cache), so the block
+    # is never copied into one big buffer first. chunk_ranges never yields a
+    # block for an empty file, which mmap could not map.
+    with open(file_path, 'rb') as f_in, mmap.mmap(f_in.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        pos = start
+        while pos < end:
+            nl = mm.find(b"\n", pos, end)
+            if nl < 0:
+                nl = end
+            line = mm[pos:nl].rstrip(b"\r")
+            pos = nl + 1
+            # Real records are long; only short lines can be blank, so only those get stripped
+            if len(line) <= 2 and not line.strip():
+                continue
+
+            try:
+                # Create a unique key for this package/version
+                match = KEY_PREFIX_RE.match(line)
+                if match:
+                    pkg_key = (match.group(1), match.group(2))
+                    # --- Check for Duplicates (before paying for a full parse) ---
+                    if pkg_key in seen_in_chunk:
+                        continue
+                    data = orjson.loads(line)
+                else:
+                    data = orjson.loads(line)
+                    pkg_key = (as_key_part(data.get("package")), as_key_part(data.get("installed_version")))
+                    if pkg_key in seen_in_chunk:
+                        continue
+            except orjson.JSONDecodeError:
+                logging.warning(f"Skipping bad JSON line in {file_path}")
+                continue
+
+            seen_in_chunk.add(pkg_key)
+            vulnerabilities = data.get("vulnerabilities", [])
+            rows.append((
+                pkg_key,
+                line,
+                len(vulnerabilities),
+                # Check if any CVE in this package has an exploit / a fix
+                any(cve.get("exploits") for cve in vulnerabilities),
+                any(cve.get("fixes") for cve in vulnerabilities),
+            ))
+    return rows
 
-logging.info(f"Creating master dataset at: {OUTPUT_FILE}")
 
-with open(OUTPUT_FILE, 'w', encoding='utf-8') as f_out:
+def main():
+    # --- Counters ---
+    total_cves = 0
+    total_packages = 0
+    packages_with_exploits = 0
+    packages_with_fixes = 0
+
+    # Set to track duplicates: (package_name, version), packed into one int.
+    # Names and versions are interned to small ids, so each seen entry is a single
+    # int instead of a tuple of two strings.
+    seen_packages = set()
+    intern_ids = {}
+
+    def intern_id(value):
+        return intern_ids.setdefault(value, len(intern_ids))
+
+    input_files = []
     for file_path in INPUT_FILES:
         if not os.path.isfile(file_path):
             logging.warning(f"Warning: File not found, skipping: {file_path}")
             continue
-        
-        logging.info(f"Processing {os.path.basename(file_path)}...")
-        with open(file_path, 'r', encoding='utf-8') as f_in:
-            for line in tqdm(f_in, desc=f"Reading {os.path.basename(file_path)}"):
-                if not line.strip():
-                    continue
-                
-                try:
-                    data = json.loads(line)
-                    pkg_name = data.get("package")
-                    pkg_version = data.get("installed_version")
-                    
-                    # Create a unique key for this package/version
-                    pkg_key = (pkg_name, pkg_version)
-                    
+        input_files.append(file_path)
+
+    logging.info(f"Creating master dataset at: {OUTPUT_FILE}")
+
+    # Blocks are independent, so they are decoded across all cores. imap yields
+    # results in input order, keeping first-seen-wins identical to a serial run.
+    tasks = [task for file_path in input_files for task in chunk_ranges(file_path)]
+    total_bytes = sum(os.path.getsize(file_path) for file_path in input_files)
+    current_file = None
+    # O_BINARY matters on Windows, where the default text mode would translate newlines
+    fd = os.open(OUTPUT_FILE, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0), 0o644)
+    out_buf = bytearray()
+    try:
+        with Pool() as pool, tqdm(
+            total=total_bytes, unit="B", unit_scale=True, desc="Reading inputs"
+        ) as pbar:
+            for (file_path, start, end), rows in zip(tasks, pool.imap(parse_chunk, tasks)):
+                if file_path != current_file:
+                    current_file = file_path
+                    bname = os.path.basename(file_path)
+                    pbar.set_description(f"Reading {bname}")
+                    logging.info(f"Processing {bname}...")
+                pbar.update(end - start)
+                for pkg_key, line, vuln_count, has_exploit, has_fix in rows:
+                    key = (intern_id(pkg_key[0]) << 32) | intern_id(pkg_key[1])
+
                     # --- Check for Duplicates ---
-                    if pkg_key in seen_packages:
+                    if key in seen_packages:
                         continue  # Skip if we've already added this exact package
-                    
+
                     # --- Add New Package ---
-                    seen_packages.add(pkg_key)
-                    f_out.write(line)  # Write the original line to the master file
+                    seen_packages.add(key)
+                    out_buf += line  # Write the original line to the master file
+                    out_buf += b"\n"
+                    if len(out_buf) >= WRITE_BUFFER_SIZE:
+                        write_all(fd, out_buf)
+                        out_buf.clear()
                     total_packages += 1
-                    
+
                     # --- Count CVEs and Features ---
-                    vulnerabilities = data.get("vulnerabilities", [])
-                    total_cves += len(vulnerabilities)
-                    
-                    # Check if any CVE in this package has an exploit
-                    if any(cve.get("exploits") for cve in vulnerabilities):
-                        packages_with_exploits += 1
-                    
-                    # Check if any CVE in this package has a fix
-                    if any(cve.get("fixes") for cve in vulnerabilities):
-                        packages_with_fixes += 1
-                        
-                except json.JSONDecodeError:
-                    logging.warning(f"Skipping bad JSON line in {file_path}")
-
-# --- Final Summary ---
-logging.info("\n--- MASTER DATASET SUMMARY ---")
-logging.info(f"Total Unique Packages:     {total_packages}")
-logging.info(f"Total CVE Records Found:   {total_cves}")
-logging.info(f"Packages w/ Exploit Links: {packages_with_exploits}")
-logging.info(f"Packages w/ Fix Links:     {packages_with_fixes}")
-logging.info(f"\n✅ Master dataset created: {OUTPUT_FILE}")
\ No newline at end of file
+                    total_cves += vuln_count
+                    packages_with_exploits += has_exploit
+                    packages_with_fixes += has_fix
+
+        write_all(fd, out_buf)
+    finally:
+        os.close(fd)
+
+    # --- Final Summary ---
+    logging.info("\n--- MASTER DATASET SUMMARY ---")
+    logging.info(f"Total Unique Packages:     {total_packages}")
+    logging.info(f"Total CVE Records Found:   {total_cves}")
+    logging.info(f"Packages w/ Exploit Links: {packages_with_exploits}")
+    logging.info(f"Packages w/ Fix Links:     {packages_with_fixes}")
+    logging.info(f"\n✅ Master dataset created: {OUTPUT_FILE}")
+
+
+if __name__ == "__main__":
+    main()
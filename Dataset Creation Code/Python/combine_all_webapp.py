@@ -1,6 +1,8 @@
 import os
 import json
 import logging
+import orjson
+from collections import defaultdict
 from tqdm import tqdm
 
 # --- Config ---
@@ -17,54 +19,54 @@ OUTPUT_FILE = os.path.join(DATASET_DIR, "package_centric_dataset.jsonl")
 
 logging.basicConfig(level=logging.INFO, format="%(message)s")
 
-# --- 1. Load the Enriched CVEs into a Lookup Map ---
+# --- 1. Load Fingerprints ---
+logging.info(f"Loading fingerprints from {FINGERPRINT_FILE}...")
+try:
+    with open(FINGERPRINT_FILE, 'r', encoding='utf-8') as f:
+        fingerprint_list = json.load(f)
+except FileNotFoundError:
+    logging.error(f"FATAL: Fingerprint input file not found at {FINGERPRINT_FILE}")
+    exit()
+except Exception as e:
+    logging.error(f"FATAL: Could not parse {FINGERPRINT_FILE}: {e}")
+    exit()
+
+# Only CVEs for these packages are kept in memory
+wanted_packages = {p.get("package") for p in fingerprint_list if p.get("package")}
+logging.info(f"Processing {len(fingerprint_list)} packages from fingerprint...")
+
+# --- 2. Stream the Enriched CVEs into a Lookup Map (wanted packages only) ---
 logging.info(f"Loading enriched CVEs from {CVE_FILE}...")
-cve_map = {}
+cve_map = defaultdict(list)
 try:
-    with open(CVE_FILE, 'r', encoding='utf-8') as f:
+    with open(CVE_FILE, 'rb') as f:
         for line in tqdm(f, desc="Loading CVEs"):
-            if not line.strip():
+            if len(line) <= 2 and not line.strip():
                 continue
             
             try:
-                cve_data = json.loads(line)
+                cve_data = orjson.loads(line)
                 pkg_name = cve_data.get("package")
                 
-                if not pkg_name:
+                if pkg_name not in wanted_packages:
                     continue
                 
                 # Add this CVE to the list for its package
-                if pkg_name not in cve_map:
-                    cve_map[pkg_name] = []
                 cve_map[pkg_name].append(cve_data)
                 
-            except json.JSONDecodeError:
-                logging.warning(f"Skipping bad JSON line: {line[:50]}...")
+            except orjson.JSONDecodeError:
+                logging.warning(f"Skipping bad JSON line: {line[:50].decode('utf-8', 'replace')}...")
 
 except FileNotFoundError:
     logging.error(f"FATAL: CVE input file not found at {CVE_FILE}")
     exit()
 
-logging.info(f"Loaded {len(cve_map)} packages with CVEs into memory.")
-
-# --- 2. Load Fingerprints and Combine ---
-logging.info(f"Loading fingerprints from {FINGERPRINT_FILE}...")
-try:
-    with open(FINGERPRINT_FILE, 'r', encoding='utf-8') as f:
-        fingerprint_list = json.load(f)
-except FileNotFoundError:
-    logging.error(f"FATAL: Fingerprint input file not found at {FINGERPRINT_FILE}")
-    exit()
-except Exception as e:
-    logging.error(f"FATAL: Could not parse {FINGERPRINT_FILE}: {e}")
-    exit()
-
-logging.info(f"Processing {len(fingerprint_list)} packages from fingerprint...")
+logging.info(f"Loaded CVEs for {len(cve_map)} fingerprinted packages into memory.")
 
 # --- 3. Write the Final Combined File ---
 total_matched = 0
 try:
-    with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
+    with open(OUTPUT_FILE, 'wb') as f:
         for package_info in tqdm(fingerprint_list, desc="Combining data"):
             pkg_name = package_info.get("package")
             if not pkg_name:
@@ -85,7 +87,8 @@ try:
             }
             
             # Write this record as a new line in the .jsonl file
-            f.write(json.dumps(combined_record, ensure_ascii=False) + "\n")
+            f.write(orjson.dumps(combined_record))
+            f.write(b"\n")
 
     logging.info("\n--- SUMMARY ---")
     logging.info(f"Successfully wrote {len(fingerprint_list)} records to {OUTPUT_FILE}")
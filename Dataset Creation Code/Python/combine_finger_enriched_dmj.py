@@ -13,6 +13,8 @@ Outputs:
 import os
 import json
 import logging
+import orjson
+from collections import defaultdict
 
 # ------- CONFIG -------
 # Source of the fingerprint files
@@ -35,19 +37,6 @@ def load_json_list(path):
         return json.load(f)
 
 
-def load_json_lines(path):
-    """Loads a JSON-Lines file."""
-    data = []
-    with open(path, "r", encoding="utf-8-sig") as f:
-        for line in f:
-            if line.strip():
-                try:
-                    data.append(json.loads(line))
-                except json.JSONDecodeError as e:
-                    logging.warning(f"Skipping bad line in {path}: {e}")
-    return data
-
-
 def process_app(app_name):
     """Loads, combines, and saves data for one app."""
     
@@ -66,16 +55,22 @@ def process_app(app_name):
     logging.info(f"Processing {app_name}...")
 
     # 1. Load enriched CVE data and create a lookup map by package name
-    enriched_data = load_json_lines(enriched_file)
-    cve_map = {}
-    for cve in enriched_data:
-        pkg_name = cve.get("package")
-        if not pkg_name:
-            continue
-        
-        if pkg_name not in cve_map:
-            cve_map[pkg_name] = []
-        cve_map[pkg_name].append(cve)
+    #    (streamed straight into the map, no intermediate list of every CVE)
+    cve_map = defaultdict(list)
+    with open(enriched_file, "rb") as f:
+        for line in f:
+            # Same BOM tolerance the utf-8-sig text read used to give
+            line = line.removeprefix(b"\xef\xbb\xbf")
+            if len(line) <= 2 and not line.strip():
+                continue
+            try:
+                cve = orjson.loads(line)
+            except orjson.JSONDecodeError as e:
+                logging.warning(f"Skipping bad line in {enriched_file}: {e}")
+                continue
+            pkg_name = cve.get("package")
+            if pkg_name:
+                cve_map[pkg_name].append(cve)
 
     # 2. Load fingerprint data (list of installed packages)
     fingerprint_data = load_json_list(fingerprint_file)
@@ -98,9 +93,11 @@ def process_app(app_name):
         combined_output.append(combined_record)
 
     # 4. Write the new combined file
-    with open(combined_file, "w", encoding="utf8") as f:
+    with open(combined_file, "wb") as f:
         for item in combined_output:
-            f.write(json.dumps(item, ensure_ascii=False) + "\n")
+            # orjson emits UTF-8 bytes directly (no ASCII escaping)
+            f.write(orjson.dumps(item))
+            f.write(b"\n")
 
     logging.info(f"Successfully created {combined_file}")
 
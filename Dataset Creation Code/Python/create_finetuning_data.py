@@ -1,6 +1,8 @@
 import os
-import json
 import logging
+from typing import List, Optional, Union
+
+import msgspec
 from tqdm import tqdm
 
 # --- Config ---
@@ -12,14 +14,52 @@ OUTPUT_FILE = os.path.join(DATASET_DIR, "finetuning_dataset_simplified.jsonl")
 
 logging.basicConfig(level=logging.INFO, format="%(message)s")
 
+SEV_SCORE = {"CRITICAL": 4, "HIGH": 3, "MEDIUM": 2, "LOW": 1}
+
 # Helper function to get the highest severity score (used for sorting only)
 def get_severity_score(severity_str):
-    severity_str = (severity_str or "UNKNOWN").upper()
-    if severity_str == "CRITICAL": return 4
-    if severity_str == "HIGH": return 3
-    if severity_str == "MEDIUM": return 2
-    if severity_str == "LOW": return 1
-    return 0
+    return SEV_SCORE.get((severity_str or "").upper(), 0)
+
+# Severity buckets for the summary breakdown; anything else counts as UNKNOWN
+SEVERITY_LABELS = ("CRITICAL", "HIGH", "MEDIUM", "LOW", "UNKNOWN")
+SEVERITY_INDEX = {label: i for i, label in enumerate(SEVERITY_LABELS)}
+UNKNOWN_INDEX = SEVERITY_INDEX["UNKNOWN"]
+HAS_EXPLOITS, HAS_FIXES = 1, 2
+
+# Typed schema of a master-dataset line. msgspec decodes straight into these
+# instead of building generic dicts; unknown keys are ignored and missing ones
+# take the defaults, matching the old .get() lookups. Types are kept loose
+# (cvss may be a string, lists may be null) so the usual drift still decodes;
+# a line that doesn't fit at all is skipped with a warning.
+class Vuln(msgspec.Struct):
+    cve_id: Optional[str] = None
+    severity: Optional[str] = None
+    cvss: Union[float, str, None] = None
+    description: Optional[str] = None
+    exploits: Optional[list] = []
+    fixes: Optional[list] = []
+
+
+class Package(msgspec.Struct):
+    package: Optional[str] = None
+    installed_version: Optional[str] = None
+    vulnerabilities: Optional[List[Vuln]] = []
+
+
+# Output side: a Vuln already has exactly the fields (and order) kept in the
+# fine-tuning completion, so decoded Vulns are re-encoded as they are.
+class Completion(msgspec.Struct):
+    report_summary_text: str
+    all_vulnerabilities: List[Vuln]
+
+
+class Entry(msgspec.Struct):
+    prompt: str
+    completion: Completion
+
+
+PACKAGE_DECODER = msgspec.json.Decoder(Package)
+ENTRY_ENCODER = msgspec.json.Encoder()
 
 def generate_summary_paragraph(pkg_name, pkg_version, vulnerabilities):
     """Generates a natural language summary paragraph."""
@@ -27,26 +67,18 @@ def generate_summary_paragraph(pkg_name, pkg_version, vulnerabilities):
         return f"Package {pkg_name} version {pkg_version} appears CLEAN based on the dataset. No vulnerabilities were found."
 
     status = "VULNERABLE"
-    severity_counts = {"CRITICAL": 0, "HIGH": 0, "MEDIUM": 0, "LOW": 0, "UNKNOWN": 0}
-    has_exploits = False
-    has_fixes = False
-
+    # One pass: severity counts plus exploit/fix flags
+    severity_counts = [0] * len(SEVERITY_LABELS)
+    flags = 0
     for vuln in vulnerabilities:
-        sev = (vuln.get("severity") or "UNKNOWN").upper()
-        if sev in severity_counts:
-            severity_counts[sev] += 1
-        else:
-            severity_counts["UNKNOWN"] += 1
-        if vuln.get("exploits"): has_exploits = True
-        if vuln.get("fixes"): has_fixes = True
+        severity_counts[SEVERITY_INDEX.get((vuln.severity or "").upper(), UNKNOWN_INDEX)] += 1
+        if vuln.exploits: flags |= HAS_EXPLOITS
+        if vuln.fixes: flags |= HAS_FIXES
+    has_exploits = bool(flags & HAS_EXPLOITS)
+    has_fixes = bool(flags & HAS_FIXES)
 
     total_vulns = len(vulnerabilities)
-    summary_parts = []
-    if severity_counts["CRITICAL"] > 0: summary_parts.append(f"{severity_counts['CRITICAL']} CRITICAL")
-    if severity_counts["HIGH"] > 0: summary_parts.append(f"{severity_counts['HIGH']} HIGH")
-    if severity_counts["MEDIUM"] > 0: summary_parts.append(f"{severity_counts['MEDIUM']} MEDIUM")
-    if severity_counts["LOW"] > 0: summary_parts.append(f"{severity_counts['LOW']} LOW")
-    if severity_counts["UNKNOWN"] > 0: summary_parts.append(f"{severity_counts['UNKNOWN']} UNKNOWN")
+    summary_parts = [f"{count} {label}" for label, count in zip(SEVERITY_LABELS, severity_counts) if count > 0]
     severity_breakdown = ", ".join(summary_parts) if summary_parts else "severity unclear"
 
     paragraph = f"Package {pkg_name} version {pkg_version} is {status}. "
@@ -56,77 +88,67 @@ def generate_summary_paragraph(pkg_name, pkg_version, vulnerabilities):
 
     return paragraph.strip()
 
+def iter_records(path):
+    """Yield one decoded Package per non-empty line, without loading the whole file."""
+    with open(path, 'rb') as f:
+        for line_no, line in enumerate(f, 1):
+            if line.strip():
+                try:
+                    yield PACKAGE_DECODER.decode(line)
+                except msgspec.ValidationError as e:
+                    # Valid JSON that doesn't match the schema: skip just this record
+                    logging.warning(f"Skipping line {line_no}: unexpected record shape ({e})")
+
 # --- Main Execution ---
 if __name__ == "__main__":
-    logging.info(f"Loading data from {INPUT_FILE}...")
+    logging.info(f"Streaming data from {INPUT_FILE} into {OUTPUT_FILE}...")
+
+    # Write to a temp file so a failure part-way never leaves a truncated dataset behind
+    tmp_output = OUTPUT_FILE + ".tmp"
+    written = 0
     try:
-        with open(INPUT_FILE, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
-        all_package_records = [json.loads(line) for line in lines if line.strip()]
-    except FileNotFoundError:
-        logging.error(f"FATAL: Input file not found: {INPUT_FILE}")
-        exit()
+        with open(tmp_output, 'wb') as f_out:
+            for package_data in tqdm(iter_records(INPUT_FILE), desc="Converting to Prompt/Completion"):
+                pkg_name = package_data.package
+                pkg_version = package_data.installed_version
+                vulnerabilities = package_data.vulnerabilities or []
+
+                if not pkg_name or not pkg_version:
+                    logging.warning(f"Skipping record due to missing package name or version.")
+                    continue
+
+                # --- 1. Create the Prompt ---
+                prompt = f"Analyze package: {pkg_name} version: {pkg_version}"
+
+                # --- 2. Create the SIMPLIFIED Completion ---
+
+                # Generate the summary paragraph
+                summary_text = generate_summary_paragraph(pkg_name, pkg_version, vulnerabilities)
+
+                # Write the prompt/completion pair as a JSON line as soon as it is built
+                # ('all_vulnerabilities' keeps essential info + link status per CVE)
+                f_out.write(ENTRY_ENCODER.encode(Entry(
+                    prompt=prompt,
+                    completion=Completion(
+                        report_summary_text=summary_text,
+                        all_vulnerabilities=vulnerabilities,
+                    ),
+                )))
+                f_out.write(b"\n")
+                written += 1
     except Exception as e:
-        logging.error(f"FATAL: Failed to load or parse input file: {e}")
+        if isinstance(e, FileNotFoundError) and e.filename == INPUT_FILE:
+            logging.error(f"FATAL: Input file not found: {INPUT_FILE}")
+        elif isinstance(e, msgspec.DecodeError):
+            logging.error(f"FATAL: Failed to parse input file: {e}")
+        else:
+            logging.error(f"Failed to write final output file: {e}")
+        if os.path.exists(tmp_output):
+            os.remove(tmp_output)
         exit()
 
-    logging.info(f"Loaded {len(all_package_records)} package records. Starting conversion to simplified fine-tuning format...")
-
-    simplified_finetuning_data = []
-
-    for package_data in tqdm(all_package_records, desc="Converting to Prompt/Completion"):
-        pkg_name = package_data.get("package")
-        pkg_version = package_data.get("installed_version")
-        vulnerabilities = package_data.get("vulnerabilities", [])
-
-        if not pkg_name or not pkg_version:
-            logging.warning(f"Skipping record due to missing package name or version.")
-            continue
-
-        # --- 1. Create the Prompt ---
-        prompt = f"Analyze package: {pkg_name} version: {pkg_version}"
-
-        # --- 2. Create the SIMPLIFIED Completion ---
-
-        # Generate the summary paragraph
-        summary_text = generate_summary_paragraph(pkg_name, pkg_version, vulnerabilities)
-
-        # Format 'all_vulnerabilities' - Keep essential info + status
-        formatted_vulns = []
-        for vuln in vulnerabilities:
-             formatted_vulns.append({
-                 "cve_id": vuln.get("cve_id"),
-                 "severity": vuln.get("severity"),
-                 "cvss": vuln.get("cvss"),
-                 "description": vuln.get("description"),
-                 "exploits": vuln.get("exploits", []), # Keep links with status
-                 "fixes": vuln.get("fixes", [])       # Keep links with status
-             })
-
-        # Build final completion object (simplified structure)
-        completion = {
-            "report_summary_text": summary_text,
-            "all_vulnerabilities": formatted_vulns
-        }
-
-        # Add the prompt/completion pair
-        simplified_finetuning_data.append({
-            "prompt": prompt,
-            "completion": completion
-        })
-
-    logging.info(f"Conversion complete. Writing {len(simplified_finetuning_data)} records to {OUTPUT_FILE}...")
-
-    # --- Write the Final Fine-tuning File ---
-    try:
-        with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
-            for entry in simplified_finetuning_data:
-                # Write each prompt/completion pair as a JSON line
-                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
-
-        logging.info(f"\n✅ Successfully wrote SIMPLIFIED fine-tuning data to {OUTPUT_FILE}")
-
-    except Exception as e:
-        logging.error(f"Failed to write final output file: {e}")
+    os.replace(tmp_output, OUTPUT_FILE)
+    logging.info(f"Conversion complete. Wrote {written} records.")
+    logging.info(f"\n✅ Successfully wrote SIMPLIFIED fine-tuning data to {OUTPUT_FILE}")
 
-    logging.info("\nAll done.")
\ No newline at end of file
+    logging.info("\nAll done.")
@@ -1,5 +1,14 @@
-from huggingface_hub import snapshot_download
 import os
+import importlib.util
+
+# Must be set before huggingface_hub is imported. hf_transfer (pip install hf_transfer)
+# splits each file into parallel range requests; only enabled when it is installed,
+# since huggingface_hub errors out if the flag is set without it
+if importlib.util.find_spec("hf_transfer"):
+    os.environ.setdefault("HF_HUB_ENABLE_HF_TRANSFER", "1")
+os.environ.setdefault("HF_HUB_DOWNLOAD_TIMEOUT", "60")  # Seconds; fail stalled connections instead of hanging
+
+from huggingface_hub import snapshot_download
 
 # --- Configuration ---
 # You might need to accept terms on the HF website first for Llama 3.1
@@ -21,7 +30,8 @@ snapshot_download(
     repo_id=model_id,
     local_dir=local_model_path,
     local_dir_use_symlinks=False, # Use False on Windows generally
-    resume_download=True # In case connection drops
+    resume_download=True, # In case connection drops
+    max_workers=8 # Download several shards at once
 )
 
 print(f"Model download complete in {local_model_path}")
\ No newline at end of file
@@ -1,7 +1,13 @@
 import os
-import json
 import glob
+import sys
 import logging
+from itertools import groupby
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from operator import attrgetter
+import orjson
+import ijson  # picks the C yajl2 backend automatically when it is installed
 from tqdm import tqdm  # <-- 1. Import tqdm
 
 # --- Config ---
@@ -18,88 +24,142 @@ CVE_OUT_PATH = os.path.join(OUTPUT_DIR, "combined_cve_details.json")
 logging.basicConfig(level=logging.INFO, format="%(message)s")
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
-# Use sets for deduplication
-fingerprint_set = set()
-cve_seen_set = set()
-all_cves_list = []
+# CVE records travel as namedtuples (cheaper to build and to send back from the
+# workers than dicts); they only become dicts when the file is written
+CVE = namedtuple("CVE", "cve_id package version severity title primary_url description")
 
-# Find all Trivy JSON scans
-scan_files = glob.glob(os.path.join(FINGERPRINT_DIR, "*.json"))
-logging.info(f"Found {len(scan_files)} Trivy scan files in {FINGERPRINT_DIR}\n")
 
-# --- 2. Wrap scan_files with tqdm ---
-for file_path in tqdm(scan_files, desc="Processing scans"):
-    # This log is no longer needed, tqdm handles it.
-    # logging.info(f"Processing {os.path.basename(file_path)}...") 
+def make_cve_key(cve_id, package, version):
+    """
+    Dedup key for a (cve_id, package, version) triple as one interned string:
+    a single cached string hash per probe instead of hashing a 3-tuple.
+    \\x1f (unit separator) cannot clash with characters in package names.
+    """
+    return sys.intern(f"{cve_id}\x1f{package}\x1f{version}")
+
+
+def extract_vulnerabilities(vulns):
+    """
+    Extract (fingerprints, cves) from an iterable of Trivy vulnerability objects.
+
+    CVEs are deduplicated within the scan here and across scans by the caller;
+    fingerprints come back sorted and deduplicated.
+    """
+    fingerprints = []
+    cves = []
+    cve_keys = set()
+    for vuln in vulns:
+        g = vuln.get
+        pkg_name = g('PkgName')
+        pkg_version = g('InstalledVersion')
+
+        # --- 1. Add to Fingerprint List ---
+        if pkg_name and pkg_version:
+            fingerprints.append((pkg_name, pkg_version))
+
+        # --- 2. Add to CVE List ---
+        cve_id = g('VulnerabilityID')
+        if not cve_id:
+            continue # Skip if no CVE ID
+
+        cve_key = make_cve_key(cve_id, pkg_name, pkg_version)
+
+        if cve_key not in cve_keys:
+            cves.append(CVE(
+                cve_id, pkg_name, pkg_version,
+                g('Severity'), g('Title'), g('PrimaryURL'), g('Description')
+            ))
+            cve_keys.add(cve_key) # Mark as seen
+    return sorted_unique(fingerprints), cves
+
+
+def parse_one(file_path):
+    """
+    Extract (fingerprints, cves) from one Trivy scan (runs in a worker process).
+
+    Only the Results[*].Vulnerabilities[*] objects are built, one at a time,
+    instead of loading the whole scan. A scan that fails to parse contributes
+    nothing.
+    """
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            scan_data = json.load(f)
+        with open(file_path, 'rb') as f:
+            return extract_vulnerabilities(ijson.items(f, 'Results.item.Vulnerabilities.item', use_float=True))
     except Exception as e:
         logging.warning(f"  Could not read or parse {file_path}: {e}")
-        continue
-
-    # Trivy reports store data in a 'Results' list
-    if not isinstance(scan_data.get('Results'), list):
-        logging.warning(f"  Skipping {file_path}: No 'Results' list found.")
-        continue
-        
-    total_vulns = 0
-    for result in scan_data.get('Results', []):
-        # Vulnerabilities are in a nested list
-        if not isinstance(result.get('Vulnerabilities'), list):
-            continue
-            
-        for vuln in result.get('Vulnerabilities', []):
-            pkg_name = vuln.get('PkgName')
-            pkg_version = vuln.get('InstalledVersion')
-            
-            # --- 1. Add to Fingerprint Set ---
-            if pkg_name and pkg_version:
-                fingerprint_set.add((pkg_name, pkg_version))
-                
-            # --- 2. Add to CVE List ---
-            cve_id = vuln.get('VulnerabilityID')
-            if not cve_id:
-                continue # Skip if no CVE ID
-
-            cve_key = (cve_id, pkg_name, pkg_version)
-
-            if cve_key not in cve_seen_set:
-                cve_record = {
-                    "cve_id": cve_id,
-                    "package": pkg_name,
-                    "version": pkg_version,
-                    "severity": vuln.get('Severity'),
-                    "title": vuln.get('Title'),
-                    "primary_url": vuln.get('PrimaryURL'),
-                    "description": vuln.get('Description')
-                }
-                all_cves_list.append(cve_record)
-                cve_seen_set.add(cve_key) # Mark as seen
-                total_vulns += 1
-                
-    # This log is optional but good for seeing detail
-    # logging.info(f"  Found {total_vulns} new vulnerabilities in {os.path.basename(file_path)}.")
-
-# --- Write Final Files ---
-
-fingerprint_list = [{"package": name, "version": ver} for name, ver in fingerprint_set]
-
-fingerprint_list.sort(key=lambda x: x['package'])
-all_cves_list.sort(key=lambda x: (x['package'], x['cve_id']))
-
-try:
-    with open(FP_OUT_PATH, 'w', encoding='utf-8') as f:
-        json.dump(fingerprint_list, f, indent=2)
-    logging.info(f"\n✅ Successfully wrote {len(fingerprint_list)} unique fingerprints to {FP_OUT_PATH}")
-except Exception as e:
-    logging.error(f"  Failed to write fingerprint file: {e}")
-
-try:
-    with open(CVE_OUT_PATH, 'w', encoding='utf-8') as f:
-        json.dump(all_cves_list, f, indent=2)
-    logging.info(f"✅ Successfully wrote {len(all_cves_list)} unique CVEs to {CVE_OUT_PATH}")
-except Exception as e:
-    logging.error(f"  Failed to write CVE file: {e}")
-
-logging.info("\nAll files processed.")
\ No newline at end of file
+        return [], []
+
+
+def sorted_unique(pairs):
+    """
+    Sort (package, version) pairs and drop consecutive repeats; cheaper than a
+    set here since the output has to be sorted anyway.
+    """
+    pairs.sort()
+    return [pair for pair, _ in groupby(pairs)]
+
+
+def write_json_array(f, records):
+    """
+    Write records as the same indented JSON array orjson.dumps(list, OPT_INDENT_2)
+    would produce, one element at a time, so the whole document is never built in memory.
+    """
+    first = True
+    for record in records:
+        # String values escape their newlines, so every raw newline is layout
+        element = orjson.dumps(record, option=orjson.OPT_INDENT_2).replace(b"\n", b"\n  ")
+        f.write((b"[\n  " if first else b",\n  ") + element)
+        first = False
+    f.write(b"[]" if first else b"\n]")
+
+
+def write_combined(fingerprint_pairs, all_cves_list):
+    """Write the combined fingerprint and CVE files from the merged results of every scan."""
+    # Already in package order (then version), so no separate sort is needed
+    fingerprint_list = [{"package": name, "version": ver} for name, ver in sorted_unique(fingerprint_pairs)]
+
+    all_cves_list.sort(key=attrgetter('package', 'cve_id'))
+
+    try:
+        with open(FP_OUT_PATH, 'wb') as f:
+            f.write(orjson.dumps(fingerprint_list, option=orjson.OPT_INDENT_2))
+        logging.info(f"\n✅ Successfully wrote {len(fingerprint_list)} unique fingerprints to {FP_OUT_PATH}")
+    except Exception as e:
+        logging.error(f"  Failed to write fingerprint file: {e}")
+
+    try:
+        with open(CVE_OUT_PATH, 'wb') as f:
+            write_json_array(f, (cve._asdict() for cve in all_cves_list))
+        logging.info(f"✅ Successfully wrote {len(all_cves_list)} unique CVEs to {CVE_OUT_PATH}")
+    except Exception as e:
+        logging.error(f"  Failed to write CVE file: {e}")
+
+
+def main():
+    # Fingerprints are deduplicated by sorting once all scans are in; CVEs use a set
+    fingerprint_pairs = []
+    cve_seen_set = set()
+    all_cves_list = []
+
+    # Find all Trivy JSON scans
+    scan_files = glob.glob(os.path.join(FINGERPRINT_DIR, "*.json"))
+    logging.info(f"Found {len(scan_files)} Trivy scan files in {FINGERPRINT_DIR}\n")
+
+    # Scans are independent, so they are parsed across all cores; map() returns
+    # them in scan_files order, so "first seen" is the same as a serial run
+    with ProcessPoolExecutor() as executor:
+        for fingerprints, cves in tqdm(executor.map(parse_one, scan_files), total=len(scan_files), desc="Processing scans"):
+            fingerprint_pairs.extend(fingerprints)
+            for cve in cves:
+                cve_key = make_cve_key(*cve[:3])  # (cve_id, package, version)
+                if cve_key not in cve_seen_set:
+                    all_cves_list.append(cve)
+                    cve_seen_set.add(cve_key)
+
+    # --- Write Final Files ---
+    write_combined(fingerprint_pairs, all_cves_list)
+
+    logging.info("\nAll files processed.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,7 @@
 import os
-import json
-import glob
 import logging
+import ijson
+import orjson
 
 # --- Config ---
 # Add both directories to a list
@@ -9,8 +9,8 @@ SCAN_DIRS = [
     r"C:\Users\Demo_\fingerprints",
     r"C:\Windows\System32"
 ]
-# Define the file patterns to look for
-FILE_PATTERNS = ["*.json", "*_trivy.json"]
+# Scan files are picked by extension (this also covers the *_trivy.json files)
+SCAN_SUFFIX = ".json"
 
 # Define the output file path
 OUTPUT_DIR = r"C:\Users\Demo_\Downloads\armoureye\Datasets"
@@ -19,10 +19,19 @@ OUTPUT_FILE = os.path.join(OUTPUT_DIR, "image_details.json")
 logging.basicConfig(level=logging.INFO, format="%(message)s")
 os.makedirs(OUTPUT_DIR, exist_ok=True) # Ensure output directory exists
 
-all_scan_files = []
-for directory in SCAN_DIRS:
-    for pattern in FILE_PATTERNS:
-        all_scan_files.extend(glob.glob(os.path.join(directory, pattern)))
+def iter_scans(dirs):
+    """Yield the path of every scan file directly inside each directory (one listing per directory)."""
+    for directory in dirs:
+        if not os.path.isdir(directory):
+            logging.warning(f"Scan directory not found, skipping: {directory}")
+            continue
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                # Skip dotfiles, as glob's "*" did
+                if entry.name.endswith(SCAN_SUFFIX) and not entry.name.startswith(".") and entry.is_file():
+                    yield entry.path
+
+all_scan_files = list(iter_scans(SCAN_DIRS))
 
 logging.info(f"Found {len(all_scan_files)} total scan files. Reading details...")
 
@@ -32,15 +41,22 @@ image_details_list = []
 # Loop through every file found
 for file_path in all_scan_files:
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        # Only the top-level keys we need are parsed; Trivy writes them before the
+        # (large) Results array, so reading stops as soon as both have been seen
+        data = {}
+        with open(file_path, 'rb') as f:
+            for key, value in ijson.kvitems(f, ''):
+                if key in ("ArtifactName", "Metadata"):
+                    data[key] = value
+                    if len(data) == 2:
+                        break
 
         # Extract the image details
         artifact_name = data.get("ArtifactName") # Get the image name
         
         # Skip if ArtifactName is missing (it's not a real scan)
         if not artifact_name:
-            logging.warning(f"Skipping {os.path.basename(file_path)}: No 'ArtifactName' found.")
+            logging.warning("Skipping %s: No 'ArtifactName' found.", os.path.basename(file_path))
             continue
 
         metadata = data.get("Metadata", {})
@@ -56,19 +72,19 @@ for file_path in all_scan_files:
             "os_name": os_name
         })
         
-        logging.info(f"Processed: {artifact_name}")
+        logging.info("Processed: %s", artifact_name)
 
-    except json.JSONDecodeError:
-        logging.warning(f"Could not parse JSON in {file_path}. Skipping.")
+    except ijson.JSONError:
+        logging.warning("Could not parse JSON in %s. Skipping.", file_path)
     except Exception as e:
         # Catch other errors, like the 'list' object error
-        logging.warning(f"An error occurred with {file_path}: {e}. Skipping.")
+        logging.warning("An error occurred with %s: %s. Skipping.", file_path, e)
 
 # --- Write the final JSON file ---
 try:
-    with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
-        # Dump the entire list as a single, nicely formatted JSON array
-        json.dump(image_details_list, f, indent=2, ensure_ascii=False)
+    with open(OUTPUT_FILE, 'wb') as f:
+        # Dump the entire list as a single, nicely formatted JSON array (UTF-8, unescaped)
+        f.write(orjson.dumps(image_details_list, option=orjson.OPT_INDENT_2))
     
     logging.info("="*30)
     logging.info(f"✅ Successfully wrote {len(image_details_list)} image details to:")
@@ -1,11 +1,20 @@
 import os
-import json
+import time
+import orjson
 import logging
 import subprocess
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # --- Config ---
 DATASET_DIR = r"C:\Users\Demo_\Downloads\armoureye\Datasets"
 INPUT_FILE = os.path.join(DATASET_DIR, "image_details.json")
+# Pulls are mostly registry/network wait, so a few run at once; kept low to stay
+# clear of Docker Hub rate limits
+MAX_PARALLEL_PULLS = 4
+# When each image was last pulled; an image that is still in the local daemon and
+# was pulled within REPULL_AFTER is not pulled again (pulling re-contacts the registry)
+PULL_LOG_FILE = os.path.join(DATASET_DIR, "pulled_images.json")
+REPULL_AFTER = 7 * 24 * 3600  # Seconds
 
 # Setup logging
 logging.basicConfig(level=logging.INFO, format="%(message)s")
@@ -13,8 +22,8 @@ logging.basicConfig(level=logging.INFO, format="%(message)s")
 # --- 1. Load and Deduplicate Image Names ---
 logging.info(f"Loading image list from {INPUT_FILE}...")
 try:
-    with open(INPUT_FILE, 'r', encoding='utf-8') as f:
-        image_data = json.load(f)
+    with open(INPUT_FILE, 'rb') as f:
+        image_data = orjson.loads(f.read())
     
     # Use a set to automatically get only unique image names
     image_names = {item.get("image_name") for item in image_data if item.get("image_name")}
@@ -31,43 +40,80 @@ except Exception as e:
     exit()
 
 logging.info(f"Found {len(image_names)} unique images to download.")
+
+try:
+    with open(PULL_LOG_FILE, 'rb') as f:
+        pull_log = orjson.loads(f.read())
+except FileNotFoundError:
+    pull_log = {}
 logging.info("="*30)
 
-# --- 2. Loop and Pull Each Image ---
+# --- 2. Pull the Images in Parallel ---
+def local_image_id(image_name):
+    """Image ID if the image is in the local daemon (no registry call), else None."""
+    result = subprocess.run(
+        ["docker", "image", "inspect", "--format", "{{.Id}}", image_name],
+        check=False, capture_output=True, text=True,
+    )
+    return result.stdout.strip() if result.returncode == 0 else None
+
+def pull(image_name):
+    """Returns ("cached" | "pulled" | "failed", image ID or Docker's error output)."""
+    image_id = local_image_id(image_name)
+    logged = pull_log.get(image_name)
+    if image_id and logged and logged.get("id") == image_id and time.time() - logged.get("pulled_at", 0) < REPULL_AFTER:
+        return "cached", image_id
+
+    # --quiet keeps Docker's progress bars out of the captured output
+    command = ["docker", "pull", "--quiet", image_name]
+    result = subprocess.run(command, check=False, capture_output=True, text=True)
+    if result.returncode != 0:
+        return "failed", result.stderr.strip()
+    return "pulled", local_image_id(image_name)
+
 successful_pulls = 0
+cached_images = 0
 failed_pulls = []
 
-for image_name in sorted(image_names):
-    logging.info(f"\nAttempting to pull: {image_name}")
-    
-    # Create the command
-    command = ["docker", "pull", image_name]
-    
-    try:
-        # Run the command. This will print Docker's output (like "Pulling...")
-        # directly to your terminal.
-        result = subprocess.run(command, check=True, text=True)
-        
-        # check=True will raise an error if the command fails
-        logging.info(f"✅ Successfully pulled: {image_name}")
-        successful_pulls += 1
-        
-    except FileNotFoundError:
-        logging.error("FATAL: 'docker' command not found.")
-        logging.error("Please ensure Docker Desktop is installed and running.")
-        exit()
-    except subprocess.CalledProcessError as e:
-        # This catches errors from Docker (e.g., "image not found")
-        logging.warning(f"⚠️ FAILED to pull: {image_name}. Docker said: {e.stderr}")
-        failed_pulls.append(image_name)
-    except Exception as e:
-        logging.error(f"An unexpected error occurred for {image_name}: {e}")
-        failed_pulls.append(image_name)
+with ThreadPoolExecutor(max_workers=MAX_PARALLEL_PULLS) as executor:
+    futures = {executor.submit(pull, image_name): image_name for image_name in sorted(image_names)}
+    for future in as_completed(futures):
+        image_name = futures[future]
+        try:
+            outcome, detail = future.result()
+        except FileNotFoundError:
+            logging.error("FATAL: 'docker' command not found.")
+            logging.error("Please ensure Docker Desktop is installed and running.")
+            executor.shutdown(cancel_futures=True)
+            exit()
+        except Exception as e:
+            logging.error("An unexpected error occurred for %s: %s", image_name, e)
+            failed_pulls.append(image_name)
+            continue
+
+        if outcome == "cached":
+            logging.info("Already present, skipping: %s", image_name)
+            cached_images += 1
+        elif outcome == "pulled":
+            logging.info("✅ Successfully pulled: %s", image_name)
+            successful_pulls += 1
+            pull_log[image_name] = {"id": detail, "pulled_at": int(time.time())}
+        else:
+            # This catches errors from Docker (e.g., "image not found")
+            logging.warning("⚠️ FAILED to pull: %s. Docker said: %s", image_name, detail)
+            failed_pulls.append(image_name)
+
+try:
+    with open(PULL_LOG_FILE, 'wb') as f:
+        f.write(orjson.dumps(pull_log, option=orjson.OPT_INDENT_2))
+except Exception as e:
+    logging.warning(f"Could not write pull log {PULL_LOG_FILE}: {e}")
 
 # --- Final Summary ---
 logging.info("\n" + "="*30)
 logging.info("DOWNLOAD COMPLETE")
 logging.info(f"Successfully pulled: {successful_pulls}")
+logging.info(f"Already present:     {cached_images}")
 logging.info(f"Failed to pull:    {len(failed_pulls)}")
 if failed_pulls:
     logging.warning(f"Failed images: {', '.join(failed_pulls)}")
\ No newline at end of file
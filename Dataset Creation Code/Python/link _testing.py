@@ -5,8 +5,8 @@ def find_unique_links(input_file, output_file):
     Reads a JSONL file, finds unique objects based on 'cve_id' and 'url',
     and writes them to a new JSONL file.
     """
-    unique_links = []
-    seen = set()
+    # key -> first object seen with it; one ordered dict instead of a seen set plus a list
+    unique_links = {}
     
     try:
         # Open the input file and read line by line
@@ -25,16 +25,14 @@ def find_unique_links(input_file, output_file):
                     key = f"{obj.get('cve_id')}|{obj.get('url')}"
                     
                     # If this combination hasn't been seen, add it
-                    if key not in seen:
-                        seen.add(key)
-                        unique_links.append(obj)
+                    unique_links.setdefault(key, obj)
                         
                 except json.JSONDecodeError:
                     print(f"Warning: Skipping malformed line: {line}")
         
         # Write the unique list to the output file in JSONL format
         with open(output_file, 'w', encoding='utf-8') as outfile:
-            for item in unique_links:
+            for item in unique_links.values():
                 json.dump(item, outfile)
                 outfile.write('\n')
                 
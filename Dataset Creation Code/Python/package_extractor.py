@@ -1,5 +1,8 @@
 import os
-import json
+import orjson
+from itertools import chain
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
 
 # Input and output paths
 INPUT_DIR = r"C:\Users\Demo_\Downloads\armoureye\Datasets\All Trivy Scans"
@@ -7,65 +10,51 @@ OUTPUT_DIR = r"C:\Users\Demo_\Downloads\armoureye\Datasets\WebApp"
 
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
+IN_DIR = Path(INPUT_DIR)
+OUT_DIR = Path(OUTPUT_DIR)
+
 def extract_packages(trivy_json):
     """Extract unique (package, version) pairs from Trivy JSON scan."""
-    unique = set()
-    results = []
-
-    if "Results" not in trivy_json:
-        return results
-
-    for result in trivy_json["Results"]:
-        # Newer Trivy structure
-        if "Packages" in result:
-            for pkg in result["Packages"]:
-                name = pkg.get("Name")
-                version = pkg.get("Version")
-                if name and version:
-                    key = (name, version)
-                    if key not in unique:
-                        unique.add(key)
-                        results.append({"package": name, "version": version})
-
-        # Older Trivy structure via vulnerabilities
-        if "Vulnerabilities" in result:
-            for vuln in result["Vulnerabilities"]:
-                name = vuln.get("PkgName")
-                version = vuln.get("InstalledVersion")
-                if name and version:
-                    key = (name, version)
-                    if key not in unique:
-                        unique.add(key)
-                        results.append({"package": name, "version": version})
-
-    return results
-
+    # One flat pass: for each result, the newer Trivy structure (Packages) then
+    # the older one via vulnerabilities; dict.fromkeys dedups while keeping
+    # first-seen order
+    unique = dict.fromkeys(
+        pair
+        for result in trivy_json.get("Results", [])
+        for pair in chain(
+            [(pkg.get("Name"), pkg.get("Version")) for pkg in result.get("Packages", [])],
+            [(vuln.get("PkgName"), vuln.get("InstalledVersion")) for vuln in result.get("Vulnerabilities", [])],
+        )
+        if pair[0] and pair[1]
+    )
+    return [{"package": name, "version": version} for name, version in unique]
 
-# Process all fingerprint files
-for filename in os.listdir(INPUT_DIR):
-    if "_fingerprint" not in filename:
-        continue
 
-    filepath = os.path.join(INPUT_DIR, filename)
-    webapp_name = filename.split("_fingerprint")[0]
+def process_file(filepath):
+    """Extract one fingerprint file's packages and write its details file (runs in a worker process)."""
+    webapp_name = filepath.name.split("_fingerprint")[0]
 
     try:
-        with open(filepath, "r", encoding="utf-8") as f:
-            data = json.load(f)
+        data = orjson.loads(filepath.read_bytes())
     except:
-        print(f"Skipping non-JSON or unreadable file: {filename}")
-        continue
+        print(f"Skipping non-JSON or unreadable file: {filepath.name}")
+        return None
 
     packages = extract_packages(data)
 
-    out_file = os.path.join(
-        OUTPUT_DIR,
-        f"{webapp_name}_package_details.json"
-    )
+    out_file = OUT_DIR / f"{webapp_name}_package_details.json"
+    out_file.write_bytes(orjson.dumps(packages, option=orjson.OPT_INDENT_2))
+
+    return out_file
 
-    with open(out_file, "w", encoding="utf-8") as f:
-        json.dump(packages, f, indent=2)
 
-    print(f"Created: {out_file}")
+# Process all fingerprint files; each one is independent, so they are spread
+# across all cores
+if __name__ == "__main__":
+    filepaths = [path for path in IN_DIR.glob("*_fingerprint*") if path.is_file()]
+    with ProcessPoolExecutor() as executor:
+        for out_file in executor.map(process_file, filepaths):
+            if out_file:
+                print(f"Created: {out_file}")
 
-print("Done.")
+    print("Done.")
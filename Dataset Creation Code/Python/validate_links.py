@@ -1,9 +1,18 @@
 import os
-import json
+import orjson
+import time
+import sqlite3
+import asyncio
 import logging
-import requests
+from collections import Counter
+import httpx
 from tqdm import tqdm
-from concurrent.futures import ThreadPoolExecutor, as_completed
+
+try:  # HTTP/2 multiplexing needs the optional h2 package (pip install "httpx[http2]")
+    import h2  # noqa: F401
+    HTTP2 = True
+except ImportError:
+    HTTP2 = False
 
 # --- Config ---
 DATASET_DIR = r"C:\Users\Demo_\Downloads\armoureye\Datasets"
@@ -13,88 +22,147 @@ INPUT_FILE = os.path.join(DATASET_DIR, "MASTER_package_dataset.jsonl")
 OUTPUT_VALIDATED_FILE = os.path.join(DATASET_DIR, "MASTER_package_dataset_validated.jsonl")
 # Output 2: File for dead/error links
 OUTPUT_DEAD_LINKS_FILE = os.path.join(DATASET_DIR, "dead_links_report.jsonl")
+# URL statuses from earlier runs; a URL is only re-checked once its entry is stale
+URL_CACHE_FILE = os.path.join(DATASET_DIR, "url_status_cache.db")
+ALIVE_TTL = 24 * 3600  # Seconds
+FAILED_TTL = 3600      # Seconds, for dead/error statuses
+CACHE_COMMIT_EVERY = 500  # New statuses written per transaction
 
 USER_AGENT = "link-validator/1.2" # Version bump
 REQUEST_TIMEOUT = 10  # Seconds
-MAX_WORKERS = 10     # Parallel checks
+MAX_CONCURRENCY = 200  # HEAD requests in flight at once
+# Transient 5xx are retried with backoff; if they persist the last response is
+# kept so the link is still reported as dead. Connection failures are retried
+# by the transport.
+RETRIES = 2
+RETRY_BACKOFF = 0.3  # Seconds, doubled per attempt
+RETRY_STATUSES = {500, 502, 503, 504}
 
 logging.basicConfig(level=logging.INFO, format="%(message)s")
-
-# --- Counters ---
-total_links_checked = 0
-links_alive = 0
-links_dead = 0 # Includes timeouts now
-links_error = 0
-
-# List to collect dead/error link info
-dead_link_records = []
-
-def check_url_status(url, cve_id, link_type):
-    """Checks a single URL using a HEAD request and collects dead links."""
-    global total_links_checked, links_alive, links_dead, links_error
-    total_links_checked += 1
-    status = "unknown"
-    try:
-        response = requests.head(url, headers={'User-Agent': USER_AGENT}, timeout=REQUEST_TIMEOUT, allow_redirects=True)
-        if 200 <= response.status_code < 400:
-            links_alive += 1
-            status = "alive"
-        elif 400 <= response.status_code < 600:
-            links_dead += 1
-            status = "dead"
+logging.getLogger("httpx").setLevel(logging.WARNING)  # it logs every request at INFO
+
+def open_url_cache():
+    conn = sqlite3.connect(URL_CACHE_FILE)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("CREATE TABLE IF NOT EXISTS url_cache (url TEXT PRIMARY KEY, status TEXT, checked_at INTEGER)")
+    return conn
+
+def load_cached_statuses(conn, urls):
+    """Returns {url: status} for the wanted URLs whose cached status is still fresh."""
+    now = int(time.time())
+    rows = conn.execute(
+        "SELECT url, status FROM url_cache WHERE checked_at >= CASE WHEN status = 'alive' THEN ? ELSE ? END",
+        (now - ALIVE_TTL, now - FAILED_TTL),
+    )
+    return {url: status for url, status in rows if url in urls}
+
+def save_statuses(conn, rows):
+    with conn:
+        conn.executemany("INSERT OR REPLACE INTO url_cache (url, status, checked_at) VALUES (?, ?, ?)", rows)
+    rows.clear()
+
+async def check_url_status(client, semaphore, url):
+    """Checks a single URL using a HEAD request; returns its status string."""
+    async with semaphore:
+        try:
+            for attempt in range(RETRIES + 1):
+                response = await client.head(url, follow_redirects=True)
+                if response.status_code not in RETRY_STATUSES or attempt == RETRIES:
+                    break
+                await asyncio.sleep(RETRY_BACKOFF * 2 ** attempt)
+            if 200 <= response.status_code < 400:
+                return "alive"
+            elif 400 <= response.status_code < 600:
+                return "dead"
+            else:
+                return f"error (status {response.status_code})" # Treat unknown status codes as errors for reporting
+        except httpx.TimeoutException:
+            return "dead (timeout)"
+        except httpx.HTTPError as e:
+            return f"error ({type(e).__name__})" # More specific error type
+        except Exception as e:
+            logging.warning(f"Unexpected error checking {url}: {e}")
+            return "error (unexpected)"
+
+def status_bucket(status):
+    """Maps a status string to its summary bucket: 'alive', 'dead' (includes timeouts) or 'error'."""
+    if status == "alive":
+        return "alive"
+    return "dead" if status.startswith("dead") else "error"
+
+def record_status(url, status, occurrences, totals, dead_link_records):
+    """Writes one URL's status into every link that uses it, counting and reporting each occurrence."""
+    bucket = status_bucket(status)
+    totals[bucket] += len(occurrences)
+    for cve_id, link_type, link in occurrences:
+        link["status"] = status
+        if bucket != "alive":
             dead_link_records.append({"cve_id": cve_id, "type": link_type, "url": url, "status": status})
-        else:
-            links_error += 1 # Treat unknown status codes as errors for reporting
-            status = f"error (status {response.status_code})"
-            dead_link_records.append({"cve_id": cve_id, "type": link_type, "url": url, "status": status})
-        return status
-    except requests.exceptions.Timeout:
-        links_dead += 1
-        status = "dead (timeout)"
-        dead_link_records.append({"cve_id": cve_id, "type": link_type, "url": url, "status": status})
-        return status
-    except requests.exceptions.RequestException as e:
-        links_error += 1
-        status = f"error ({type(e).__name__})" # More specific error type
-        dead_link_records.append({"cve_id": cve_id, "type": link_type, "url": url, "status": status})
-        return status
-    except Exception as e:
-        links_error += 1
-        status = "error (unexpected)"
-        logging.warning(f"Unexpected error checking {url}: {e}")
-        dead_link_records.append({"cve_id": cve_id, "type": link_type, "url": url, "status": status})
-        return status
-
-def process_package_record(package_data):
-    """Processes URLs within the vulnerabilities list of a package record."""
-    vulnerabilities = package_data.get("vulnerabilities", [])
-    if not isinstance(vulnerabilities, list):
-        return package_data
-
-    for cve in vulnerabilities:
-        if not isinstance(cve, dict): continue
-        cve_id = cve.get("cve_id", "UNKNOWN_CVE") # Get CVE ID for reporting dead links
-
-        # Process Exploits
-        if "exploits" in cve and isinstance(cve["exploits"], list):
-            for exploit in cve["exploits"]:
-                if isinstance(exploit, dict) and "url" in exploit:
-                    exploit["status"] = check_url_status(exploit["url"], cve_id, "exploit")
-
-        # Process Fixes
-        if "fixes" in cve and isinstance(cve["fixes"], list):
-             for fix in cve["fixes"]:
-                if isinstance(fix, dict) and "url" in fix:
-                    fix["status"] = check_url_status(fix["url"], cve_id, "fix")
-    return package_data
+
+def collect_links(all_records):
+    """Groups every exploit/fix link by URL: {url: [(cve_id, link_type, link_dict), ...]}."""
+    links_by_url = {}
+    for package_data in all_records:
+        vulnerabilities = package_data.get("vulnerabilities", [])
+        if not isinstance(vulnerabilities, list):
+            continue
+
+        for cve in vulnerabilities:
+            if not isinstance(cve, dict): continue
+            cve_id = cve.get("cve_id", "UNKNOWN_CVE") # Get CVE ID for reporting dead links
+
+            for link_type, key in (("exploit", "exploits"), ("fix", "fixes")):
+                if isinstance(cve.get(key), list):
+                    for link in cve[key]:
+                        if isinstance(link, dict) and "url" in link:
+                            links_by_url.setdefault(link["url"], []).append((cve_id, link_type, link))
+    return links_by_url
+
+async def validate_links(links_by_url, cache_conn):
+    """
+    HEADs each distinct URL once, concurrently on one event loop, and records the result on every use of it.
+
+    Returns (totals, dead_link_records): a Counter of links per status bucket and
+    one report entry per dead/error link.
+    """
+    totals = Counter()
+    dead_link_records = []
+    cached = load_cached_statuses(cache_conn, links_by_url)
+    for url, status in cached.items():
+        record_status(url, status, links_by_url[url], totals, dead_link_records)
+    logging.info(f"{len(cached)} URLs have a fresh cached status; checking the other {len(links_by_url) - len(cached)}...")
+    new_rows = []
+
+    limits = httpx.Limits(max_connections=MAX_CONCURRENCY, max_keepalive_connections=MAX_CONCURRENCY // 2)
+    transport = httpx.AsyncHTTPTransport(http2=HTTP2, limits=limits, retries=RETRIES)
+    semaphore = asyncio.Semaphore(MAX_CONCURRENCY)
+
+    async def check(url, occurrences):
+        status = await check_url_status(client, semaphore, url)
+        record_status(url, status, occurrences, totals, dead_link_records)
+        new_rows.append((url, status, int(time.time())))
+        if len(new_rows) >= CACHE_COMMIT_EVERY:
+            save_statuses(cache_conn, new_rows)
+
+    async with httpx.AsyncClient(
+        transport=transport, headers={"User-Agent": USER_AGENT}, timeout=REQUEST_TIMEOUT
+    ) as client:
+        tasks = [check(url, occurrences) for url, occurrences in links_by_url.items() if url not in cached]
+        try:
+            for done in tqdm(asyncio.as_completed(tasks), total=len(tasks), desc="Validating URLs"):
+                await done
+        finally:
+            # Keep whatever was checked even if the run is interrupted
+            save_statuses(cache_conn, new_rows)
+    return totals, dead_link_records
 
 # --- Main Execution ---
 if __name__ == "__main__":
     logging.info(f"Loading data from {INPUT_FILE}...")
     try:
-        with open(INPUT_FILE, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
-        all_records = [json.loads(line) for line in lines if line.strip()]
+        with open(INPUT_FILE, 'rb') as f:
+            all_records = [orjson.loads(line) for line in f if line.strip()]
     except FileNotFoundError:
         logging.error(f"FATAL: Input file not found: {INPUT_FILE}")
         exit()
@@ -104,26 +172,25 @@ if __name__ == "__main__":
 
     logging.info(f"Loaded {len(all_records)} package records. Starting URL validation...")
 
-    validated_records = []
-
-    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
-        futs = {executor.submit(process_package_record, record): record for record in all_records}
-        for future in tqdm(as_completed(futs), total=len(all_records), desc="Validating URLs"):
-            try:
-                result = future.result()
-                if result:
-                    validated_records.append(result)
-            except Exception as e:
-                logging.error(f"Error processing a record: {e}")
+    # Statuses are written into the records in place, so they keep their input order
+    links_by_url = collect_links(all_records)
+    logging.info(f"Checking {len(links_by_url)} distinct URLs...")
+    cache_conn = open_url_cache()
+    try:
+        totals, dead_link_records = asyncio.run(validate_links(links_by_url, cache_conn))
+    finally:
+        cache_conn.close()
+    validated_records = all_records
 
     logging.info(f"Validation complete.")
 
     # --- Write Validated Master File ---
     try:
         logging.info(f"Writing {len(validated_records)} records to {OUTPUT_VALIDATED_FILE}...")
-        with open(OUTPUT_VALIDATED_FILE, 'w', encoding='utf-8') as f:
+        with open(OUTPUT_VALIDATED_FILE, 'wb') as f:
             for entry in validated_records:
-                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+                f.write(orjson.dumps(entry))
+                f.write(b"\n")
         logging.info(f"✅ Successfully wrote validated data to {OUTPUT_VALIDATED_FILE}")
     except Exception as e:
         logging.error(f"Failed to write validated master file: {e}")
@@ -131,9 +198,10 @@ if __name__ == "__main__":
     # --- Write Dead Links Report File ---
     try:
         logging.info(f"Writing {len(dead_link_records)} dead/error links to {OUTPUT_DEAD_LINKS_FILE}...")
-        with open(OUTPUT_DEAD_LINKS_FILE, 'w', encoding='utf-8') as f:
+        with open(OUTPUT_DEAD_LINKS_FILE, 'wb') as f:
             for record in dead_link_records:
-                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+                f.write(orjson.dumps(record))
+                f.write(b"\n")
         logging.info(f"✅ Successfully wrote dead links report to {OUTPUT_DEAD_LINKS_FILE}")
     except Exception as e:
         logging.error(f"Failed to write dead links report file: {e}")
@@ -141,9 +209,9 @@ if __name__ == "__main__":
 
     # --- Print Summary ---
     logging.info("\n--- URL VALIDATION SUMMARY ---")
-    logging.info(f"Total Links Checked: {total_links_checked}")
-    logging.info(f"Links Alive (2xx/3xx): {links_alive}")
-    logging.info(f"Links Dead (4xx/5xx/Timeout): {links_dead}")
-    logging.info(f"Links with Errors (Connection/SSL/Unknown Status/etc.): {links_error}")
+    logging.info(f"Total Links Checked: {sum(totals.values())}")
+    logging.info(f"Links Alive (2xx/3xx): {totals['alive']}")
+    logging.info(f"Links Dead (4xx/5xx/Timeout): {totals['dead']}")
+    logging.info(f"Links with Errors (Connection/SSL/Unknown Status/etc.): {totals['error']}")
 
     logging.info("\nAll done.")
\ No newline at end of file